@@ -1,25 +1,17 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import get_db
-from app.crud.user import get_user_by_email
-from app.utils.security import verify_password
+from app.crud.user import get_user
+from app.utils.security import verify_password, get_password_hash  # noqa: F401
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -31,9 +23,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
+    # Sub-requests of POST /batch reuse the user authenticated for the whole batch
+    batch_user = getattr(request.state, "user", None)
+    if batch_user is not None:
+        return batch_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -47,7 +45,16 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user_by_email(db, user_id)
+    user = get_user(db, user_id)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+def is_operator(user) -> bool:
+    return user.email in settings.OPERATOR_EMAILS
+
+async def get_current_operator(current_user = Depends(get_current_user)):
+    """The current user, if it is one of ``OPERATOR_EMAILS``; 403 otherwise."""
+    if not is_operator(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator access required")
+    return current_user
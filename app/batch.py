@@ -0,0 +1,130 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+
+from app.config import settings
+from app.schemas.batch import BatchRequestItem, BatchResponseItem
+
+# Routes that cannot be part of a batch: the batch endpoint itself and the SSE streams,
+# which never complete
+EXCLUDED_ROUTES = {"batch", "stream_death_verification", "stream_transfers"}
+
+
+def _match_route(app, scope) -> Optional[Any]:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+def _build_scope(parent: Request, item: BatchRequestItem, body: bytes, state: Dict[str, Any]):
+    url = urlsplit(item.path)
+    headers = [
+        (name, value) for name, value in parent.scope["headers"]
+        if name in (b"authorization", b"user-agent", b"accept-language")
+    ]
+    headers.append((b"content-type", b"application/json"))
+    headers.append((b"content-length", str(len(body)).encode()))
+    return {
+        "type": "http",
+        "asgi": parent.scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent.scope.get("http_version", "1.1"),
+        "method": item.method.value,
+        "scheme": parent.scope.get("scheme", "http"),
+        "server": parent.scope.get("server"),
+        "client": parent.scope.get("client"),
+        "root_path": parent.scope.get("root_path", ""),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "state": {**parent.scope.get("state", {}), **state},
+    }
+
+
+async def _dispatch(parent: Request, item: BatchRequestItem, state: Dict[str, Any]) -> BatchResponseItem:
+    """Run one sub-request through the ASGI app in-process and capture its response."""
+    app = parent.app
+    body = json.dumps(item.body).encode() if item.body is not None else b""
+    scope = _build_scope(parent, item, body, state)
+
+    route = _match_route(app, scope)
+    if route is None:
+        return BatchResponseItem(id=item.id, status=404, body={"detail": "Not Found"})
+    if route.name in EXCLUDED_ROUTES:
+        return BatchResponseItem(id=item.id, status=400, body={"detail": "Route cannot be batched"})
+
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    response: Dict[str, Any] = {"status": 500, "headers": {}, "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode(): value.decode() for name, value in message.get("headers", [])
+                if name.lower() not in (b"content-length", b"content-type")
+            }
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # ServerErrorMiddleware has already sent a 500 response before re-raising
+        pass
+
+    content = response["body"]
+    try:
+        content = json.loads(content) if content else None
+    except ValueError:
+        content = content.decode(errors="replace")
+    return BatchResponseItem(id=item.id, status=response["status"], headers=response["headers"], body=content)
+
+
+async def run_batch(request: Request, items: List[BatchRequestItem], db: Session, user) -> List[BatchResponseItem]:
+    """Execute sub-requests in order, sharing the batch's authentication.
+
+    Writes run one after another on the batch's session. Each run of consecutive GETs is
+    independent of the others, so it is executed concurrently; concurrent reads get their
+    own pooled sessions because a Session must not be used from several threads at once.
+    """
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch")
+
+    results: List[BatchResponseItem] = []
+    i = 0
+    while i < len(items):
+        if items[i].method.value != "GET":
+            result = await _dispatch(request, items[i], {"db": db, "user": user})
+            if result.status >= 500:
+                # Don't let a failed write poison the shared session for the rest of the batch
+                await run_in_threadpool(db.rollback)
+            results.append(result)
+            i += 1
+            continue
+
+        j = i
+        while j < len(items) and items[j].method.value == "GET":
+            j += 1
+        reads = items[i:j]
+        if len(reads) == 1:
+            results.append(await _dispatch(request, reads[0], {"db": db, "user": user}))
+        else:
+            results.extend(await asyncio.gather(*(_dispatch(request, item, {"user": user}) for item in reads)))
+        i = j
+    return results
@@ -0,0 +1,407 @@
+"""Read-through cache for crud getters.
+
+Lookups go to an in-process LRU first, then to an optional shared tier (``SharedCache``),
+then to the database. Concurrent misses on one key are collapsed into a single query.
+
+Entries hold column values, not ORM instances, and are re-attached to the caller's session
+on a hit without touching the database. Columns marked ``info={"cache": False}``, such as
+password hashes, are never stored; they load from the database if accessed. Keys carry a version per entity: writers bump the
+version after committing, which makes every copy of the old entry unreachable in all tiers
+and processes that share the version store. Without a shared tier versions are process-local
+and other processes see changes once their local entries expire (``CACHE_LOCAL_TTL``).
+"""
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+
+# Bump when the cached row layout changes so old entries are ignored
+KEY_SCHEMA = 2
+GENERATION_KEY = "generation"
+COUNTER_PREFIX = "counter:"
+TEMP_PREFIX = ".tmp"
+
+
+class SharedCache:
+    """Base class for the shared tier. Values are bytes; versions are integer counters."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def version(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemorySharedCache(SharedCache):
+    """Shared tier held in this process; stands in for an external cache in tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, tuple] = {}
+        self._counters: Dict[str, int] = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._values.get(key)
+        return entry[0] if entry and entry[1] > time.monotonic() else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def version(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+
+class FileSharedCache(SharedCache):
+    """Shared tier in a local directory, so several worker processes on one host can share it.
+
+    Each entry file's mtime is set to its expiry time, so ``sweep`` finds expired entries,
+    including ones orphaned by a version bump, from the directory listing alone. ``set``
+    sweeps every ``sweep_interval`` seconds; ``get`` deletes an expired entry it reads.
+    """
+
+    def __init__(self, directory: str, sweep_interval: float = 60.0):
+        self.directory = directory
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = time.time() + sweep_interval
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace("/", "_").replace(":", "_"))
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _write(self, key: str, value, expires: Optional[float] = None):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=TEMP_PREFIX)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f)
+        if expires is not None:
+            os.utime(tmp, (expires, expires))
+        os.replace(tmp, self._path(key))
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def get(self, key):
+        entry = self._read(key)
+        if entry is None:
+            return None
+        if entry[1] > time.time():
+            return entry[0]
+        # A writer may have just replaced it; deleting that copy only costs a miss
+        self._remove(self._path(key))
+        return None
+
+    def set(self, key, value, ttl):
+        expires = time.time() + ttl
+        self._write(key, (value, expires), expires)
+        self._maybe_sweep()
+
+    def incr(self, key):
+        # Not atomic across processes; good enough for a single-host stand-in
+        with self._lock:
+            value = self.version(key) + 1
+            self._write(COUNTER_PREFIX + key, value)
+            return value
+
+    def version(self, key):
+        value = self._read(COUNTER_PREFIX + key)
+        return value or 0
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self) -> int:
+        """Delete expired entries and temp files left by crashed writers. Returns the number removed."""
+        now = time.time()
+        counters = os.path.basename(self._path(COUNTER_PREFIX))
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(counters):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            # A temp file lives for one write, so an old one belongs to a writer that died
+            limit = now - self.sweep_interval if entry.name.startswith(TEMP_PREFIX) else now
+            if mtime <= limit and self._remove(entry.path):
+                removed += 1
+        return removed
+
+
+class LRUCache:
+    """Thread-safe LRU of bytes values with a per-entry TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[bytes] = None
+        # Whether load() found anything: a result that can't be snapshotted also leaves value None
+        self.found = False
+        self.error: Optional[BaseException] = None
+
+
+class ReadThroughCache:
+    def __init__(self, shared: Optional[SharedCache] = None, maxsize: int = 10000,
+                 local_ttl: float = 5.0, shared_ttl: float = 300.0):
+        self.local = LRUCache(maxsize, local_ttl)
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    # Versions
+    def _version(self, name: str) -> int:
+        if self.shared is not None:
+            return self.shared.version(name)
+        with self._versions_lock:
+            return self._versions.get(name, 0)
+
+    def _bump(self, name: str):
+        if self.shared is not None:
+            self.shared.incr(name)
+            return
+        with self._versions_lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def _key(self, namespace: str, key: Any) -> str:
+        entity = f"{namespace}:{key}"
+        return f"v{KEY_SCHEMA}:g{self._version(GENERATION_KEY)}:{entity}:{self._version(entity)}"
+
+    def invalidate(self, namespace: str, key: Any):
+        """Call after the write that changed the entity has been committed."""
+        self._bump(f"{namespace}:{key}")
+
+    def invalidate_all(self):
+        self._bump(GENERATION_KEY)
+        self.local.clear()
+
+    # Lookups
+    def _lookup(self, cache_key: str) -> Optional[bytes]:
+        value = self.local.get(cache_key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(cache_key)
+            if value is not None:
+                self.local.set(cache_key, value)
+        return value
+
+    def _store(self, cache_key: str, value: bytes):
+        self.local.set(cache_key, value)
+        if self.shared is not None:
+            self.shared.set(cache_key, value, self.shared_ttl)
+
+    def get(self, db: Session, namespace: str, key: Any, load: Callable[[], Any]):
+        """Return ``load()``'s result (an instance, a list of instances or None) through the cache.
+
+        ``load`` runs against ``db``; on a hit the cached rows are attached to ``db`` instead.
+        Misses are not cached.
+        """
+        cache_key = self._key(namespace, key)
+        value = self._lookup(cache_key)
+        if value is not None:
+            self.hits += 1
+            return _attach(db, pickle.loads(value))
+
+        self.misses += 1
+        with self._flights_lock:
+            flight = self._flights.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[cache_key] = _Flight()
+
+        if not leader:
+            # Another thread is loading this key; use its result
+            flight.done.wait()
+            if not flight.found and flight.error is None:
+                return None
+            if flight.value is None:
+                # The load failed, or its result wasn't cacheable: load it ourselves
+                return load()
+            return _attach(db, pickle.loads(flight.value))
+
+        try:
+            result = load()
+            flight.found = result is not None
+            flight.value = _snapshot(result)
+            if flight.value is not None:
+                self._store(cache_key, flight.value)
+            return result
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[cache_key]
+            flight.done.set()
+
+
+def _cached_columns(mapper) -> list:
+    return [attr for attr in mapper.column_attrs if attr.columns[0].info.get("cache", True)]
+
+
+def _row(instance) -> tuple:
+    state = inspect(instance)
+    values = {attr.key: state.dict[attr.key] for attr in _cached_columns(state.mapper) if attr.key in state.dict}
+    # Sharded sessions put the shard id in the identity key
+    identity_token = state.key[2] if state.key else None
+    return state.mapper.class_, identity_token, values
+
+
+def _cacheable(instance) -> bool:
+    # Partially loaded (sparse) or locally modified instances aren't cached
+    state = inspect(instance)
+    columns = {attr.key for attr in _cached_columns(state.mapper)}
+    return not state.modified and not (state.unloaded & columns)
+
+
+def _snapshot(result) -> Optional[bytes]:
+    if result is None:
+        return None
+    if isinstance(result, list):
+        if not all(_cacheable(instance) for instance in result):
+            return None
+        return pickle.dumps(("many", [_row(instance) for instance in result]))
+    if not _cacheable(result):
+        return None
+    return pickle.dumps(("one", _row(result)))
+
+
+def _instance(db: Session, row: tuple):
+    model, identity_token, values = row
+    mapper = inspect(model)
+    identity_key = mapper.identity_key_from_primary_key(
+        [values[column.key] for column in mapper.primary_key], identity_token=identity_token
+    )
+    existing = db.identity_map.get(identity_key)
+    if existing is not None:
+        # Keep the session's copy, which may carry unflushed changes
+        return existing
+    instance = mapper.class_manager.new_instance()
+    state = inspect(instance)
+    state.identity_token = identity_token
+    for key, value in values.items():
+        state.dict[key] = value
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+def _attach(db: Session, snapshot):
+    kind, rows = snapshot
+    if kind == "many":
+        return [_instance(db, row) for row in rows]
+    return _instance(db, rows)
+
+
+def _shared_from_settings() -> Optional[SharedCache]:
+    backend = settings.CACHE_SHARED_BACKEND
+    if not backend:
+        return None
+    if backend == "memory":
+        return MemorySharedCache()
+    if backend.startswith("file:"):
+        return FileSharedCache(backend[len("file:"):])
+    raise ValueError(f"Unknown CACHE_SHARED_BACKEND: {backend}")
+
+
+_cache: Optional[ReadThroughCache] = None
+
+def get_cache() -> ReadThroughCache:
+    global _cache
+    if _cache is None:
+        _cache = ReadThroughCache(
+            shared=_shared_from_settings(),
+            maxsize=settings.CACHE_SIZE,
+            local_ttl=settings.CACHE_LOCAL_TTL,
+            shared_ttl=settings.CACHE_SHARED_TTL,
+        )
+    return _cache
+
+def set_cache(cache: Optional[ReadThroughCache]):
+    global _cache
+    _cache = cache
+
+def cached(db: Session, namespace: str, key: Any, load: Callable[[], Any]):
+    if not settings.CACHE_ENABLED:
+        return load()
+    return get_cache().get(db, namespace, key, load)
+
+def invalidate(namespace: str, key: Any):
+    if settings.CACHE_ENABLED:
+        get_cache().invalidate(namespace, key)
+
+def invalidate_all():
+    if settings.CACHE_ENABLED:
+        get_cache().invalidate_all()
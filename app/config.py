@@ -8,5 +8,47 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Comma-separated database URLs, one per owner shard; empty disables sharding
+    SHARD_URLS: list = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+    # Comma-separated emails of accounts allowed to use operator endpoints (full audit re-verification,
+    # throttle metrics)
+    OPERATOR_EMAILS: list = [email.strip() for email in os.getenv("OPERATOR_EMAILS", "").split(",") if email.strip()]
+    SHARD_MAP_FILE: str = os.getenv("SHARD_MAP_FILE", "shard_map.json")
+    # Pooled connections per engine (MariaDB), and how many are opened before the app serves requests
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", "5"))
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+    BULK_APPROVAL_MAX_ITEMS: int = int(os.getenv("BULK_APPROVAL_MAX_ITEMS", "500"))
+    # Seconds between audit-log sealing runs, and the most entries sealed under one Merkle root
+    AUDIT_SEAL_INTERVAL: float = float(os.getenv("AUDIT_SEAL_INTERVAL", "2"))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "1024"))
+    # Seconds between scans for missed check-ins, and the most users claimed per transaction
+    CHECKIN_SCAN_INTERVAL: float = float(os.getenv("CHECKIN_SCAN_INTERVAL", "60"))
+    CHECKIN_BATCH_SIZE: int = int(os.getenv("CHECKIN_BATCH_SIZE", "500"))
+    # Beneficiary approvals a missed check-in needs before transfers start (capped at the number of heirs)
+    MISSED_CHECKIN_REQUIRED_APPROVALS: int = int(os.getenv("MISSED_CHECKIN_REQUIRED_APPROVALS", "2"))
+    # Read-through cache for crud getters (see app/cache.py)
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    CACHE_SIZE: int = int(os.getenv("CACHE_SIZE", "10000"))
+    CACHE_LOCAL_TTL: float = float(os.getenv("CACHE_LOCAL_TTL", "5"))
+    # "" (local tier only), "memory", or "file:/path/to/dir"
+    CACHE_SHARED_BACKEND: str = os.getenv("CACHE_SHARED_BACKEND", "")
+    CACHE_SHARED_TTL: float = float(os.getenv("CACHE_SHARED_TTL", "300"))
+    # Login throttling (see app/throttle.py); backend is "memory" or "sqlite:/path/to/file.db"
+    LOGIN_THROTTLE_BACKEND: str = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+    LOGIN_IP_LIMIT: int = int(os.getenv("LOGIN_IP_LIMIT", "30"))
+    LOGIN_IP_WINDOW: float = float(os.getenv("LOGIN_IP_WINDOW", "60"))
+    LOGIN_EMAIL_LIMIT: int = int(os.getenv("LOGIN_EMAIL_LIMIT", "5"))
+    LOGIN_EMAIL_WINDOW: float = float(os.getenv("LOGIN_EMAIL_WINDOW", "300"))
+    # Password hashes per second across the process (or host, with a shared backend)
+    LOGIN_HASH_RATE: float = float(os.getenv("LOGIN_HASH_RATE", "10"))
+    LOGIN_HASH_BURST: float = float(os.getenv("LOGIN_HASH_BURST", "20"))
+
+    def __init__(self, **overrides):
+        # Settings(DATABASE_URL=...) overrides single values, e.g. for create_app()
+        for name, value in overrides.items():
+            if not hasattr(Settings, name):
+                raise TypeError(f"Unknown setting: {name}")
+            setattr(self, name, value)
 
 settings = Settings()
\ No newline at end of file
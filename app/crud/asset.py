@@ -1,18 +1,35 @@
+from typing import List, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.asset import DigitalAsset, Beneficiary
+from app.models.event import DeathVerificationEvent
+from app.models.user import User
+from app import cache
 from app.schemas.asset import DigitalAssetCreate, DigitalAssetUpdate, BeneficiaryCreate
+from app.utils.fields import ATTRIBUTE_MAP, load_columns
 
-def get_asset(db: Session, asset_id: int):
-    return db.query(DigitalAsset).filter(DigitalAsset.id == asset_id).first()
+def get_asset(db: Session, asset_id: int, fields: Optional[List[str]] = None):
+    query = db.query(DigitalAsset).filter(DigitalAsset.id == asset_id)
+    if fields is not None:
+        # owner_id is always needed for the ownership check
+        return query.options(load_columns(DigitalAsset, fields, required=["owner_id"])).first()
+    return cache.cached(db, "asset", asset_id, query.first)
 
-def get_user_assets(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(DigitalAsset).filter(DigitalAsset.owner_id == user_id).offset(skip).limit(limit).all()
+def get_user_assets(db: Session, user_id: int, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None):
+    query = db.query(DigitalAsset).filter(DigitalAsset.owner_id == user_id)
+    if fields is not None:
+        query = query.options(load_columns(DigitalAsset, fields))
+    return query.offset(skip).limit(limit).all()
+
+def _column_values(data: dict):
+    return {ATTRIBUTE_MAP.get(field, field): value for field, value in data.items()}
 
 def create_asset(db: Session, asset: DigitalAssetCreate, owner_id: int):
-    db_asset = DigitalAsset(**asset.dict(), owner_id=owner_id)
+    db_asset = DigitalAsset(**_column_values(asset.dict()), owner_id=owner_id)
     db.add(db_asset)
     db.commit()
     db.refresh(db_asset)
+    cache.invalidate("asset", db_asset.id)
     return db_asset
 
 def update_asset(db: Session, asset_id: int, asset_update: DigitalAssetUpdate):
@@ -20,12 +37,13 @@ def update_asset(db: Session, asset_id: int, asset_update: DigitalAssetUpdate):
     if not db_asset:
         return None
     
-    update_data = asset_update.dict(exclude_unset=True)
+    update_data = _column_values(asset_update.dict(exclude_unset=True))
     for field, value in update_data.items():
         setattr(db_asset, field, value)
     
     db.commit()
     db.refresh(db_asset)
+    cache.invalidate("asset", asset_id)
     return db_asset
 
 def add_beneficiary(db: Session, asset_id: int, beneficiary: BeneficiaryCreate):
@@ -33,7 +51,47 @@ def add_beneficiary(db: Session, asset_id: int, beneficiary: BeneficiaryCreate):
     db.add(db_beneficiary)
     db.commit()
     db.refresh(db_beneficiary)
+    cache.invalidate("asset_beneficiaries", asset_id)
     return db_beneficiary
 
 def get_asset_beneficiaries(db: Session, asset_id: int):
-    return db.query(Beneficiary).filter(Beneficiary.asset_id == asset_id).all()
\ No newline at end of file
+    query = db.query(Beneficiary).filter(Beneficiary.asset_id == asset_id)
+    return cache.cached(db, "asset_beneficiaries", asset_id, query.all)
+
+def get_user_inheritances(db: Session, user_id: int, after: Optional[int] = None, limit: int = 50):
+    """Assets naming ``user_id`` as beneficiary, ordered by asset id, with each owner's latest verification.
+
+    One query: an ``idx_beneficiaries_user`` range scan starting after the ``after`` asset id,
+    joined to the asset and owner by primary key, plus each owner's newest verification
+    event found through ``idx_death_events_user``.
+    """
+    latest_event_id = (
+        db.query(func.max(DeathVerificationEvent.id))
+        .filter(DeathVerificationEvent.user_id == DigitalAsset.owner_id)
+        .correlate(DigitalAsset)
+        .scalar_subquery()
+    )
+    query = (
+        db.query(
+            Beneficiary.asset_id,
+            Beneficiary.share_percentage,
+            Beneficiary.approval_required,
+            DigitalAsset.name.label("asset_name"),
+            DigitalAsset.asset_type,
+            DigitalAsset.is_active,
+            DigitalAsset.owner_id,
+            User.full_name.label("owner_name"),
+            DeathVerificationEvent.id.label("verification_id"),
+            DeathVerificationEvent.status.label("verification_status"),
+        )
+        .join(DigitalAsset, DigitalAsset.id == Beneficiary.asset_id)
+        .join(User, User.id == DigitalAsset.owner_id)
+        .outerjoin(DeathVerificationEvent, DeathVerificationEvent.id == latest_event_id)
+        .filter(Beneficiary.user_id == user_id)
+    )
+    if after is not None:
+        query = query.filter(Beneficiary.asset_id > after)
+    rows = query.order_by(Beneficiary.asset_id).limit(limit).all()
+    # Sharded sessions concatenate one page per shard
+    return sorted(rows, key=lambda row: row.asset_id)[:limit]
+
@@ -0,0 +1,242 @@
+from typing import Dict, List, Optional
+from sqlalchemy import case, inspect, update
+from sqlalchemy.orm import Session
+from app.models.audit import AuditLogEntry, AuditBatch, AuditChainState
+from app.models.event import MultisigApproval, AssetTransfer
+from app.sharding import session_shards, on_shard
+from app.utils import merkle
+
+def approval_record(approval: MultisigApproval):
+    return {
+        "id": approval.id,
+        "event_id": approval.event_id,
+        "approver_id": approval.approver_id,
+        "approval_status": approval.approval_status,
+        "comments": approval.comments,
+    }
+
+def transfer_record(transfer: AssetTransfer):
+    # Only fields fixed at creation; transfer_status moves on after the entry is sealed
+    return {
+        "id": transfer.id,
+        "asset_id": transfer.asset_id,
+        "from_user_id": transfer.from_user_id,
+        "to_user_id": transfer.to_user_id,
+        "death_event_id": transfer.death_event_id,
+        "metadata": transfer.metadata_,
+    }
+
+def approval_leaf_hash(approval: MultisigApproval) -> str:
+    return merkle.leaf_hash({"type": "multisig_approval", **approval_record(approval)})
+
+def transfer_leaf_hash(transfer: AssetTransfer) -> str:
+    return merkle.leaf_hash({"type": "asset_transfer", **transfer_record(transfer)})
+
+def record_approval(db: Session, approval: MultisigApproval, owner_id: int):
+    """Add an unsealed entry for ``approval``; committed together with the caller's transaction."""
+    db.add(AuditLogEntry(
+        entity_type="multisig_approval",
+        entity_id=approval.id,
+        owner_id=owner_id,
+        leaf_hash=approval_leaf_hash(approval),
+    ))
+
+def record_transfers(db: Session, transfers: List[AssetTransfer]):
+    db.add_all([
+        AuditLogEntry(
+            entity_type="asset_transfer",
+            entity_id=transfer.id,
+            owner_id=transfer.from_user_id,
+            leaf_hash=transfer_leaf_hash(transfer),
+        )
+        for transfer in transfers
+    ])
+
+def _chain_head(db: Session, shard_id: Optional[str]):
+    return db.query(AuditBatch).execution_options(**on_shard(shard_id)).order_by(AuditBatch.id.desc()).first()
+
+def _lock_chain(db: Session, shard_id: Optional[str]) -> AuditChainState:
+    """The chain-state row, locked so concurrent sealers extend the chain one at a time.
+
+    Locking the newest batch instead isn't enough: a sealer that waited on it would read the
+    same head once the lock was released and chain a second batch onto it.
+    """
+    state = (
+        db.query(AuditChainState)
+        .execution_options(**on_shard(shard_id))
+        .filter(AuditChainState.id == 1)
+        .with_for_update()
+        .first()
+    )
+    if state is None:
+        # Created by migrations/init.sql on MariaDB; start it from the current head otherwise.
+        # A sealer racing this insert fails on the primary key and seals on its next run.
+        head = _chain_head(db, shard_id)
+        state = AuditChainState(
+            id=1,
+            head_batch_id=head.id if head else None,
+            head_hash=head.batch_hash if head else merkle.GENESIS_HASH,
+        )
+        if shard_id is not None:
+            inspect(state).identity_token = shard_id
+        db.add(state)
+    return state
+
+def seal_pending(db: Session, batch_size: int = 1024) -> int:
+    """Seal unsealed entries under Merkle roots, one hash-chained batch of up to ``batch_size`` at a time.
+
+    Each shard keeps its own chain. Returns the number of entries sealed.
+    """
+    sealed = 0
+    for shard_id in session_shards(db):
+        while True:
+            options = on_shard(shard_id)
+            state = _lock_chain(db, shard_id)
+            entries = (
+                db.query(AuditLogEntry.id, AuditLogEntry.leaf_hash)
+                .execution_options(**options)
+                .filter(AuditLogEntry.batch_id.is_(None))
+                .order_by(AuditLogEntry.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not entries:
+                db.rollback()
+                break
+
+            root = merkle.merkle_root([entry.leaf_hash for entry in entries])
+            prev_hash = state.head_hash
+            batch = AuditBatch(
+                merkle_root=root,
+                prev_hash=prev_hash,
+                batch_hash=merkle.chain_hash(prev_hash, root, len(entries)),
+                entry_count=len(entries),
+                first_entry_id=entries[0].id,
+                last_entry_id=entries[-1].id,
+            )
+            if shard_id is not None:
+                # Keep the batch on the shard whose entries it seals
+                inspect(batch).identity_token = shard_id
+            db.add(batch)
+            db.flush()
+            state.head_batch_id, state.head_hash = batch.id, batch.batch_hash
+            ids = [entry.id for entry in entries]
+            db.execute(
+                update(AuditLogEntry)
+                .where(AuditLogEntry.id.in_(ids))
+                .values(
+                    batch_id=batch.id,
+                    leaf_index=case({entry_id: index for index, entry_id in enumerate(ids)}, value=AuditLogEntry.id),
+                )
+                .execution_options(synchronize_session=False, **options)
+            )
+            db.commit()
+            sealed += len(entries)
+            if len(entries) < batch_size:
+                break
+    return sealed
+
+def _leaves(db: Session, shard_id: Optional[str], batch_ids: List[int]) -> Dict[int, List[str]]:
+    rows = (
+        db.query(AuditLogEntry.batch_id, AuditLogEntry.leaf_hash)
+        .execution_options(**on_shard(shard_id))
+        .filter(AuditLogEntry.batch_id.in_(batch_ids))
+        .order_by(AuditLogEntry.batch_id, AuditLogEntry.leaf_index)
+        .all()
+    )
+    leaves: Dict[int, List[str]] = {batch_id: [] for batch_id in batch_ids}
+    for row in rows:
+        leaves[row.batch_id].append(row.leaf_hash)
+    return leaves
+
+def get_proof(db: Session, entity_type: str, entity_id: int):
+    """Inclusion proof for an entity's entry, or None if it was never logged."""
+    entry = db.query(AuditLogEntry).filter(
+        AuditLogEntry.entity_type == entity_type,
+        AuditLogEntry.entity_id == entity_id
+    ).first()
+    if entry is None:
+        return None
+    proof = {
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "leaf_hash": entry.leaf_hash,
+        "sealed": entry.batch_id is not None,
+    }
+    if entry.batch_id is None:
+        return proof
+
+    shard_id = inspect(entry).identity_token
+    batch = (
+        db.query(AuditBatch)
+        .execution_options(**on_shard(shard_id))
+        .filter(AuditBatch.id == entry.batch_id)
+        .first()
+    )
+    leaves = _leaves(db, shard_id, [batch.id])[batch.id]
+    proof.update(
+        batch_id=batch.id,
+        leaf_index=entry.leaf_index,
+        merkle_root=batch.merkle_root,
+        prev_hash=batch.prev_hash,
+        batch_hash=batch.batch_hash,
+        entry_count=batch.entry_count,
+        path=merkle.inclusion_proof(leaves, entry.leaf_index),
+    )
+    return proof
+
+def verify_log(db: Session, full: bool = False, chunk_size: int = 100):
+    """Check the Merkle root and chain link of every batch sealed since the last verification.
+
+    Progress is kept in each shard's chain-state row, so repeated calls, from any process,
+    only read new batches; ``full`` starts over from the first batch.
+    """
+    result = {"valid": True, "batches_verified": 0, "entries_verified": 0, "errors": []}
+    for shard_id in session_shards(db):
+        options = on_shard(shard_id)
+        state = db.query(AuditChainState).execution_options(**options).filter(AuditChainState.id == 1).first()
+        last_id, prev_hash = 0, merkle.GENESIS_HASH
+        if not full and state is not None and state.verified_batch_id is not None:
+            last_id, prev_hash = state.verified_batch_id, state.verified_hash
+
+        while True:
+            batches = (
+                db.query(AuditBatch)
+                .execution_options(**options)
+                .filter(AuditBatch.id > last_id)
+                .order_by(AuditBatch.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not batches:
+                break
+            leaves = _leaves(db, shard_id, [batch.id for batch in batches])
+            for batch in batches:
+                batch_leaves = leaves[batch.id]
+                error = None
+                if batch.prev_hash != prev_hash:
+                    error = "chain link does not match the previous batch"
+                elif len(batch_leaves) != batch.entry_count:
+                    error = "entry count does not match"
+                elif merkle.merkle_root(batch_leaves) != batch.merkle_root:
+                    error = "merkle root does not match the entries"
+                elif merkle.chain_hash(prev_hash, batch.merkle_root, batch.entry_count) != batch.batch_hash:
+                    error = "batch hash does not match"
+                if error:
+                    result["valid"] = False
+                    result["errors"].append({"shard": shard_id, "batch_id": batch.id, "error": error})
+                    break
+                prev_hash, last_id = batch.batch_hash, batch.id
+                result["batches_verified"] += 1
+                result["entries_verified"] += batch.entry_count
+            if last_id or full:
+                # Locked only to save progress, so sealers aren't held up by the reads above. A full
+                # run that fails early moves the checkpoint back to the last batch that verified.
+                state = _lock_chain(db, shard_id)
+                state.verified_batch_id = last_id or None
+                state.verified_hash = prev_hash if last_id else None
+                db.commit()
+            if not result["valid"] or len(batches) < chunk_size:
+                break
+    return result
@@ -1,7 +1,18 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, distinct, func, inspect, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.event import DeathVerificationEvent, MultisigApproval, AssetTransfer
 from app.models.asset import DigitalAsset, Beneficiary
-from app.schemas.event import DeathVerificationCreate, MultisigApprovalCreate
+from app.models.user import User
+from app.schemas.event import DeathVerificationCreate, MultisigApprovalCreate, BulkApprovalItem
+from app import cache, pubsub
+from app.config import settings
+from app.crud import audit as audit_crud
+from app.sharding import bulk_insert, check_writable, session_shards, on_shard
+from app.utils.fields import load_columns
 
 def create_death_verification(db: Session, event: DeathVerificationCreate, initiated_by: int):
     db_event = DeathVerificationEvent(
@@ -12,23 +23,93 @@ def create_death_verification(db: Session, event: DeathVerificationCreate, initi
     db.add(db_event)
     db.commit()
     db.refresh(db_event)
+    cache.invalidate("death_verification", db_event.id)
     return db_event
 
-def get_death_verification(db: Session, event_id: int):
-    return db.query(DeathVerificationEvent).filter(DeathVerificationEvent.id == event_id).first()
+def get_death_verification(db: Session, event_id: int, fields: Optional[List[str]] = None):
+    query = db.query(DeathVerificationEvent).filter(DeathVerificationEvent.id == event_id)
+    if fields is not None:
+        return query.options(load_columns(DeathVerificationEvent, fields)).first()
+    return cache.cached(db, "death_verification", event_id, query.first)
+
+def get_user_transfers(db: Session, user_id: int, fields: Optional[List[str]] = None):
+    query = db.query(AssetTransfer).filter(
+        (AssetTransfer.from_user_id == user_id) |
+        (AssetTransfer.to_user_id == user_id)
+    )
+    if fields is not None:
+        query = query.options(load_columns(AssetTransfer, fields))
+    return query.all()
+
+class ApprovalRefused(Exception):
+    STATUS_CODES = {
+        "Event not found": 404,
+        "Event is not pending": 409,
+        "Already responded to this event": 409,
+        "Only the owner's beneficiaries can respond to a missed check-in": 403,
+    }
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = self.STATUS_CODES[reason]
+
+def _heir_of(db: Session, owner_ids: List[int], user_id: int) -> set:
+    """The owners among ``owner_ids`` who left ``user_id`` a share of some asset."""
+    if not owner_ids:
+        return set()
+    return {
+        row.owner_id
+        for row in db.query(DigitalAsset.owner_id)
+        .join(Beneficiary, Beneficiary.asset_id == DigitalAsset.id)
+        .filter(DigitalAsset.owner_id.in_(owner_ids), Beneficiary.user_id == user_id)
+        .distinct()
+    }
+
+def _approval_error(event: Optional[DeathVerificationEvent], responded: set, heir_of: set) -> Optional[str]:
+    """Why a response to ``event`` is refused, or None. Shared by the single and bulk paths."""
+    if event is None:
+        return "Event not found"
+    # Verified, rejected (e.g. cancelled by a check-in) and stalled events take no more responses
+    if event.status != "pending":
+        return "Event is not pending"
+    if event.id in responded:
+        return "Already responded to this event"
+    # Nobody vouched for a missed check-in event, so only heirs may move it forward
+    if event.verification_type == "missed_checkin" and event.user_id not in heir_of:
+        return "Only the owner's beneficiaries can respond to a missed check-in"
+    return None
 
 def add_approval(db: Session, event_id: int, approval: MultisigApprovalCreate, approver_id: int):
+    """Record one approver's decision. Raises ``ApprovalRefused`` without writing anything."""
+    # Lock the event first and check it, from the row itself rather than a cached copy
+    event = db.query(DeathVerificationEvent).filter(DeathVerificationEvent.id == event_id).with_for_update().first()
+    responded = set()
+    heir_of = set()
+    if event is not None:
+        responded = {
+            row.event_id
+            for row in db.query(MultisigApproval.event_id).filter(
+                MultisigApproval.event_id == event_id,
+                MultisigApproval.approver_id == approver_id
+            )
+        }
+        if event.verification_type == "missed_checkin":
+            heir_of = _heir_of(db, [event.user_id], approver_id)
+    error = _approval_error(event, responded, heir_of)
+    if error:
+        db.rollback()
+        raise ApprovalRefused(error)
+
     db_approval = MultisigApproval(
         **approval.dict(),
         event_id=event_id,
         approver_id=approver_id
     )
     db.add(db_approval)
-    db.commit()
-    db.refresh(db_approval)
-    
-    # Update approval count
-    event = get_death_verification(db, event_id)
+    # Flush for the approval's id; its audit entry commits in the same transaction
+    db.flush()
+    audit_crud.record_approval(db, db_approval, owner_id=event.user_id)
     if approval.approval_status == "approved":
         event.current_approvals += 1
         
@@ -36,34 +117,309 @@ def add_approval(db: Session, event_id: int, approval: MultisigApprovalCreate, a
         if event.current_approvals >= event.required_approvals:
             event.status = "verified"
             # Trigger asset transfer
-            trigger_asset_transfer(db, event_id)
+            trigger_asset_transfers(db, [event_id])
     
     db.commit()
+    db.refresh(db_approval)
+    cache.invalidate("death_verification", event_id)
+    publish_verification(event)
     return db_approval
 
-def trigger_asset_transfer(db: Session, event_id: int):
-    event = get_death_verification(db, event_id)
-    if event.status != "verified":
+def publish_verification(event: DeathVerificationEvent):
+    pubsub.publish(pubsub.verification_topic(event.id), verification_message(event))
+
+def publish_verification_messages(messages: List[dict]):
+    """Publish committed verification changes; also drops the events' cached copies."""
+    for message in messages:
+        cache.invalidate("death_verification", message["data"]["id"])
+        pubsub.publish(pubsub.verification_topic(message["data"]["id"]), message)
+
+def verification_message(event: DeathVerificationEvent):
+    return {
+        "event": "verification",
+        "data": {
+            "id": event.id,
+            "user_id": event.user_id,
+            "status": event.status,
+            "current_approvals": event.current_approvals,
+            "required_approvals": event.required_approvals,
+        }
+    }
+
+def publish_transfer(message: dict):
+    data = message["data"]
+    pubsub.publish(pubsub.transfers_topic(data["to_user_id"]), message)
+    pubsub.publish(pubsub.transfers_topic(data["from_user_id"]), message)
+
+def transfer_message(transfer: AssetTransfer):
+    return {
+        "event": "transfer",
+        "data": {
+            "id": transfer.id,
+            "asset_id": transfer.asset_id,
+            "from_user_id": transfer.from_user_id,
+            "to_user_id": transfer.to_user_id,
+            "death_event_id": transfer.death_event_id,
+            "transfer_status": transfer.transfer_status,
+            "metadata": transfer.metadata_,
+        }
+    }
+
+def trigger_asset_transfers(db: Session, event_ids: List[int]):
+    """Create pending transfers for every verified event in ``event_ids``, then commit and publish them.
+
+    The deceased owners' assets and their beneficiaries are read with one query each, however
+    many events there are.
+    """
+    if not event_ids:
         return
-    
-    # Get all assets of the deceased user
-    assets = db.query(DigitalAsset).filter(DigitalAsset.owner_id == event.user_id).all()
-    
+    events = [
+        event for event in db.query(DeathVerificationEvent).filter(DeathVerificationEvent.id.in_(event_ids)).all()
+        if event.status == "verified"
+    ]
+    if not events:
+        return
+
+    # Get all assets of the deceased users
+    assets = db.query(DigitalAsset).filter(
+        DigitalAsset.owner_id.in_({event.user_id for event in events})
+    ).order_by(DigitalAsset.id).all()
+    beneficiaries = defaultdict(list)
+    if assets:
+        for beneficiary in db.query(Beneficiary).filter(
+            Beneficiary.asset_id.in_([asset.id for asset in assets])
+        ).order_by(Beneficiary.id):
+            beneficiaries[beneficiary.asset_id].append(beneficiary)
+    assets_by_owner = defaultdict(list)
     for asset in assets:
-        beneficiaries = db.query(Beneficiary).filter(Beneficiary.asset_id == asset.id).all()
-        
-        for beneficiary in beneficiaries:
-            transfer = AssetTransfer(
-                asset_id=asset.id,
-                from_user_id=event.user_id,
-                to_user_id=beneficiary.user_id,
-                death_event_id=event_id,
-                transfer_status="pending",
-                metadata={
-                    "share_percentage": float(beneficiary.share_percentage),
-                    "asset_type": asset.asset_type
-                }
-            )
-            db.add(transfer)
+        assets_by_owner[asset.owner_id].append(asset)
+
+    transfers = []
+    for event in sorted(events, key=lambda event: event.id):
+        for asset in assets_by_owner[event.user_id]:
+            for beneficiary in beneficiaries[asset.id]:
+                transfer = AssetTransfer(
+                    asset_id=asset.id,
+                    from_user_id=event.user_id,
+                    to_user_id=beneficiary.user_id,
+                    death_event_id=event.id,
+                    transfer_status="pending",
+                    metadata_={
+                        "share_percentage": float(beneficiary.share_percentage),
+                        "asset_type": asset.asset_type
+                    }
+                )
+                db.add(transfer)
+                transfers.append(transfer)
     
-    db.commit()
\ No newline at end of file
+    # Flush so ids are assigned before commit expires the instances
+    db.flush()
+    audit_crud.record_transfers(db, transfers)
+    messages = [transfer_message(transfer) for transfer in transfers]
+    db.commit()
+    for message in messages:
+        publish_transfer(message)
+
+def add_approvals(db: Session, items: List[BulkApprovalItem], approver_id: int) -> List[dict]:
+    """Record one approver's decisions on many events, returning a result per item in request order.
+
+    The events are locked together, the approvals go in with one bulk INSERT and the counters
+    of approved events are bumped by one set-based UPDATE (per shard when sharded).
+    Events that reach their threshold have their transfers generated together.
+    """
+    event_ids = sorted({item.event_id for item in items})
+    events = {
+        event.id: event
+        for event in db.query(DeathVerificationEvent)
+        .filter(DeathVerificationEvent.id.in_(event_ids))
+        .order_by(DeathVerificationEvent.id)
+        .with_for_update()
+        .all()
+    }
+    responded = {
+        row.event_id
+        for row in db.query(MultisigApproval.event_id).filter(
+            MultisigApproval.event_id.in_(event_ids),
+            MultisigApproval.approver_id == approver_id
+        )
+    }
+
+    heir_of = _heir_of(
+        db, sorted({event.user_id for event in events.values() if event.verification_type == "missed_checkin"}),
+        approver_id
+    )
+
+    results = []
+    accepted = []
+    for item in items:
+        result = {"event_id": item.event_id, "ok": False}
+        results.append(result)
+        error = _approval_error(events.get(item.event_id), responded, heir_of)
+        if error:
+            result["error"] = error
+        else:
+            responded.add(item.event_id)
+            accepted.append((result, item, events[item.event_id]))
+    if not accepted:
+        db.rollback()
+        return results
+
+    # The bulk INSERT and UPDATE below bypass the flush hook that refuses writes to owners being moved
+    check_writable(db, {event.user_id for _, _, event in accepted})
+    by_shard = defaultdict(list)
+    for _, item, event in accepted:
+        by_shard[inspect(event).identity_token].append((item, event))
+    approvals = {}
+    verified = []
+    for shard_id, shard_items in by_shard.items():
+        options = on_shard(shard_id)
+        bulk_insert(db, shard_id, MultisigApproval.__table__, [
+            {
+                "event_id": item.event_id,
+                "approver_id": approver_id,
+                "approval_status": item.approval_status.value,
+                "comments": item.comments,
+            }
+            for item, _ in shard_items
+        ])
+        # Read the new rows back for their ids; (event_id, approver_id) is unique
+        for approval in db.query(MultisigApproval).execution_options(**options).filter(
+            MultisigApproval.event_id.in_([item.event_id for item, _ in shard_items]),
+            MultisigApproval.approver_id == approver_id
+        ):
+            approvals[approval.event_id] = approval
+
+        approved = [event for item, event in shard_items if item.approval_status == "approved"]
+        if not approved:
+            continue
+        # Same rule as add_approval: verified once the count reaches the threshold. Only pending
+        # events are touched, so the CASE can't revive a rejected one. status is assigned first:
+        # MariaDB evaluates SET left to right, so it must see the old count.
+        db.execute(
+            update(DeathVerificationEvent)
+            .where(
+                DeathVerificationEvent.id.in_([event.id for event in approved]),
+                DeathVerificationEvent.status == "pending"
+            )
+            .ordered_values(
+                (DeathVerificationEvent.status, case(
+                    (DeathVerificationEvent.current_approvals + 1 >= DeathVerificationEvent.required_approvals, "verified"),
+                    else_="pending"
+                )),
+                (DeathVerificationEvent.current_approvals, DeathVerificationEvent.current_approvals + 1),
+            )
+            .execution_options(synchronize_session=False, **options)
+        )
+        # Mirror the UPDATE on the locked rows instead of reading them back
+        for event in approved:
+            count = (event.current_approvals or 0) + 1
+            set_committed_value(event, "current_approvals", count)
+            if count >= event.required_approvals:
+                set_committed_value(event, "status", "verified")
+                verified.append(event.id)
+
+    for result, _, event in accepted:
+        approval = approvals[event.id]
+        audit_crud.record_approval(db, approval, owner_id=event.user_id)
+        result.update(
+            ok=True,
+            approval_id=approval.id,
+            status=event.status,
+            current_approvals=event.current_approvals,
+            required_approvals=event.required_approvals,
+            transfers_triggered=event.id in verified,
+        )
+    messages = [verification_message(event) for _, _, event in accepted]
+
+    trigger_asset_transfers(db, verified)
+    db.commit()
+    publish_verification_messages(messages)
+    return results
+
+def _heir_counts(db: Session, owner_ids: List[int], shard_id: Optional[str]) -> Dict[int, int]:
+    """Distinct beneficiaries per owner."""
+    return {
+        row.owner_id: row.heirs
+        for row in db.query(DigitalAsset.owner_id, func.count(distinct(Beneficiary.user_id)).label("heirs"))
+        .execution_options(**on_shard(shard_id))
+        .join(Beneficiary, Beneficiary.asset_id == DigitalAsset.id)
+        .filter(DigitalAsset.owner_id.in_(owner_ids))
+        .group_by(DigitalAsset.owner_id)
+    }
+
+def open_missed_checkin_verifications(db: Session, now: Optional[datetime] = None, batch_size: int = 500) -> int:
+    """Open a pending ``missed_checkin`` verification for every user whose check-in is overdue.
+
+    Due users are found by a range scan on ``idx_users_next_due`` and claimed ``batch_size``
+    at a time with ``FOR UPDATE SKIP LOCKED``, so several scanners can run side by side.
+    Claiming clears ``next_due_at``: each missed deadline opens one event, and the user's
+    next check-in re-arms the switch. Each event needs ``MISSED_CHECKIN_REQUIRED_APPROVALS``
+    approvals from the owner's beneficiaries, or all of them if there are fewer. Returns the
+    number of events opened.
+    """
+    now = now or datetime.utcnow()
+    opened = 0
+    for shard_id in session_shards(db):
+        while True:
+            due = (
+                db.query(User.id, User.last_checkin_at, User.next_due_at)
+                .execution_options(**on_shard(shard_id))
+                .filter(User.next_due_at <= now)
+                .order_by(User.next_due_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not due:
+                db.rollback()
+                break
+
+            heirs = _heir_counts(db, [row.id for row in due], shard_id)
+            events = [
+                DeathVerificationEvent(
+                    user_id=row.id,
+                    initiated_by=row.id,
+                    status="pending",
+                    verification_type="missed_checkin",
+                    evidence_data={
+                        "last_checkin_at": row.last_checkin_at.isoformat() if row.last_checkin_at else None,
+                        "due_at": row.next_due_at.isoformat(),
+                    },
+                    required_approvals=max(1, min(settings.MISSED_CHECKIN_REQUIRED_APPROVALS, heirs.get(row.id, 0))),
+                    current_approvals=0,
+                )
+                for row in due
+            ]
+            db.add_all(events)
+            db.execute(
+                update(User)
+                .where(User.id.in_([row.id for row in due]))
+                .values(next_due_at=None, updated_at=User.updated_at)
+                .execution_options(synchronize_session=False, **on_shard(shard_id))
+            )
+            db.flush()
+            messages = [verification_message(event) for event in events]
+            db.commit()
+            for row in due:
+                cache.invalidate("user", row.id)
+            publish_verification_messages(messages)
+            opened += len(due)
+            if len(due) < batch_size:
+                break
+    return opened
+
+def cancel_missed_checkin_verifications(db: Session, user_id: int):
+    """Reject the user's pending missed-check-in verifications.
+
+    The caller commits, then publishes the returned messages.
+    """
+    events = db.query(DeathVerificationEvent).filter(
+        DeathVerificationEvent.user_id == user_id,
+        DeathVerificationEvent.verification_type == "missed_checkin",
+        DeathVerificationEvent.status == "pending"
+    ).all()
+    for event in events:
+        event.status = "rejected"
+    db.flush()
+    return [verification_message(event) for event in events]
+
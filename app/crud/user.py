@@ -1,11 +1,16 @@
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.utils.security import get_password_hash
+from app.crud import event as event_crud
+from app import cache
+from app.utils.security import get_password_hash, verify_password
 
 
 def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+    return cache.cached(db, "user", user_id, db.query(User).filter(User.id == user_id).first)
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
@@ -24,6 +29,7 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    cache.invalidate("user", db_user.id)
     return db_user
 
 def update_user(db: Session, user_id: int, user_update: UserUpdate):
@@ -37,12 +43,63 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
     
     db.commit()
     db.refresh(db_user)
+    cache.invalidate("user", user_id)
     return db_user
 
-def authenticate_user(db: Session, email: str, password: str):
+def authenticate_user(db: Session, email: str, password: str, before_verify: Optional[Callable[[], None]] = None):
+    """Return the user if the password matches, else False.
+
+    ``before_verify`` runs only when a bcrypt verify is about to happen and may raise to
+    skip it (login throttling).
+    """
     user = get_user_by_email(db, email)
     if not user:
         return False
+    if before_verify is not None:
+        before_verify()
     if not verify_password(password, user.hashed_password):
         return False
-    return user
\ No newline at end of file
+    return user
+
+def update_checkin_settings(db: Session, user_id: int, checkin_interval: Optional[int]):
+    """Set, change or clear the check-in interval.
+
+    Only the owner can do this, so it counts as a sign of life: a pending missed-check-in
+    verification is rejected, as on a check-in.
+    """
+    db_user = get_user(db, user_id)
+    db_user.checkin_interval = checkin_interval
+    db_user.next_due_at = datetime.utcnow().replace(microsecond=0) + timedelta(seconds=checkin_interval) if checkin_interval else None
+    messages = event_crud.cancel_missed_checkin_verifications(db, user_id)
+    db.commit()
+    db.refresh(db_user)
+    cache.invalidate("user", user_id)
+    event_crud.publish_verification_messages(messages)
+    return db_user
+
+def _set_checkin(db: Session, user_id: int, values: dict):
+    # updated_at is set to itself so neither the ORM nor MariaDB's ON UPDATE bumps it,
+    # which keeps check-ins out of the users history table
+    return db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(updated_at=User.updated_at, **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def check_in(db: Session, user: User):
+    """Push the user's next check-in deadline out by their interval.
+
+    A single-row UPDATE, which also re-arms the switch if the scanner already fired. Any
+    pending missed-check-in verification is rejected. That is checked on every check-in rather
+    than inferred from ``next_due_at``, which a settings change may have set again since.
+    """
+    now = datetime.utcnow().replace(microsecond=0)
+    values = {"last_checkin_at": now, "next_due_at": now + timedelta(seconds=user.checkin_interval)}
+    _set_checkin(db, user.id, values)
+    messages = event_crud.cancel_missed_checkin_verifications(db, user.id)
+    db.commit()
+    cache.invalidate("user", user.id)
+    event_crud.publish_verification_messages(messages)
+    return values
+
@@ -1,15 +1,158 @@
-from sqlalchemy import create_engine
+import threading
+from contextlib import contextmanager
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite+pysqlite://") or ":memory:" in url
+
+
+def make_engine(url: str, enforce_foreign_keys: bool = True, **kwargs):
+    """Create an engine for MariaDB or SQLite (file or in-memory)."""
+    if not is_sqlite(url):
+        return create_engine(url, pool_pre_ping=True, **kwargs)
+
+    kwargs.setdefault("connect_args", {"check_same_thread": False})
+    if _is_memory(url):
+        # Every connection would otherwise get its own empty in-memory database
+        kwargs.setdefault("poolclass", StaticPool)
+    sqlite_engine = create_engine(url, **kwargs)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _sqlite_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work (used by rollback_session)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        if enforce_foreign_keys:
+            cursor.execute("PRAGMA foreign_keys=ON")
+        if not _is_memory(url):
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    @event.listens_for(sqlite_engine, "begin")
+    def _sqlite_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return sqlite_engine
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+_engine = None
+_router = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """The engine for ``DATABASE_URL``, created on first use. Binds ``SessionLocal`` to it."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            options = {} if is_sqlite(settings.DATABASE_URL) else {"pool_size": settings.DB_POOL_SIZE}
+            _engine = make_engine(settings.DATABASE_URL, **options)
+            SessionLocal.configure(bind=_engine)
+    return _engine
+
+def get_router():
+    """The owner-shard router when SHARD_URLS is configured, otherwise None."""
+    global _router
+    if _router is None and settings.SHARD_URLS:
+        # Imported here: the router needs the models, which need Base
+        from app.sharding import ShardRouter
+        _router = ShardRouter(settings.SHARD_URLS, settings.SHARD_MAP_FILE)
+    return _router
+
+def __getattr__(name):
+    # The engine used to be created at import; keep ``database.engine`` working
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_sessionmaker():
+    """The shard router's sessionmaker when sharded, otherwise ``SessionLocal``."""
+    router = get_router()
+    if router is not None:
+        return router.sessionmaker
+    get_engine()
+    return SessionLocal
+
+def open_session() -> Session:
+    return get_sessionmaker()()
+
+def get_engines() -> list:
+    """Every engine the app uses: one per shard, or the single engine."""
+    router = get_router()
+    return list(router.engines.values()) if router is not None else [get_engine()]
+
+def warm_pool(size: int):
+    """Open up to ``size`` connections per engine and return them to the pool.
+
+    Run before the app serves traffic, so the first requests don't pay for connecting.
+    """
+    for pool_engine in get_engines():
+        capacity = pool_engine.pool.size() if isinstance(pool_engine.pool, QueuePool) else 1
+        connections = [pool_engine.connect() for _ in range(min(size, capacity))]
+        for connection in connections:
+            connection.close()
+
+def dispose_engines():
+    """Close every pooled connection and drop the engines; the next use creates them again."""
+    global _engine, _router
+    with _engine_lock:
+        engines = list(_router.engines.values()) if _router is not None else []
+        if _engine is not None:
+            engines.append(_engine)
+        for disposed in engines:
+            disposed.dispose()
+        _engine = _router = None
+
+def init_db(bind=None):
+    """Create all tables from the models. MariaDB deployments use migrations/init.sql instead."""
+    # Import the models so they are registered on Base.metadata
+    from app.models import user, asset, event as event_models, audit  # noqa: F401
+    if bind is None and get_router() is not None:
+        for shard_engine in get_router().engines.values():
+            Base.metadata.create_all(bind=shard_engine)
+        return
+    Base.metadata.create_all(bind=bind or get_engine())
+
+@contextmanager
+def rollback_session(bind=None):
+    """Session whose work is rolled back on exit, including commits made by crud functions.
+
+    Commits inside release a SAVEPOINT instead of the outer transaction, which makes this
+    suitable as a per-test fixture against a shared schema.
+    """
+    connection = (bind or get_engine()).connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+        # Don't serve rows that were cached from the rolled-back transaction
+        from app import cache
+        cache.invalidate_all()
+
+def get_db(request: Request):
+    # Sub-requests of POST /batch share the batch's session
+    shared = getattr(request.state, "db", None)
+    if shared is not None:
+        yield shared
+        return
+    db = open_session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,60 +1,167 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.database import get_db
-from app.auth import get_current_user, create_access_token, verify_password
-from app.schemas.user import User, UserCreate, UserLogin, Token
-from app.schemas.asset import DigitalAsset, DigitalAssetCreate, DigitalAssetUpdate, Beneficiary, BeneficiaryCreate, DigitalAssetWithBeneficiaries
-from app.schemas.event import DeathVerification, DeathVerificationCreate, MultisigApproval, MultisigApprovalCreate, AssetTransfer
+from app.config import Settings, settings
+from app import database
+from app.database import get_db, init_db, is_sqlite
+from app.auth import get_current_user, get_current_operator, create_access_token, is_operator, verify_password
+from app.schemas.user import User, UserCreate, UserLogin, Token, CheckinSettings, CheckinStatus
+from app.schemas.asset import DigitalAsset, DigitalAssetCreate, DigitalAssetUpdate, Beneficiary, BeneficiaryCreate, DigitalAssetWithBeneficiaries, InheritancePage
+from app.schemas.event import DeathVerification, DeathVerificationCreate, MultisigApproval, MultisigApprovalCreate, AssetTransfer, BulkApprovalRequest, BulkApprovalResult
+from app.schemas.batch import BatchRequest, BatchResponseItem
+from app.schemas.audit import InclusionProof, LogVerification
 from app.crud import user as user_crud
 from app.crud import asset as asset_crud
 from app.crud import event as event_crud
+from app.crud import audit as audit_crud
+from app import pubsub
+from app.batch import run_batch
+from app.workers import start_worker, stop_workers
+from app.throttle import Throttled, get_throttle, set_throttle
+from app.sharding import OwnerMoving
+from app.cache import set_cache
+from app.utils.security import load_hash_backend
+from app.utils.fields import parse_fields, to_dict, sparse_response
 from app.models.user import User as UserModel
 from app.models.event import DeathVerificationEvent, AssetTransfer as AssetTransferModel
 
-app = FastAPI(
-    title="Digital Legacy Vault API",
-    description="A secure system for managing digital assets and automating transfers to beneficiaries upon verified death",
-    version="1.0.0"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+router = APIRouter()
+
+def seal_audit_log():
+    db = database.open_session()
+    try:
+        audit_crud.seal_pending(db, batch_size=settings.AUDIT_BATCH_SIZE)
+    finally:
+        db.close()
+
+def scan_missed_checkins():
+    db = database.open_session()
+    try:
+        event_crud.open_missed_checkin_verifications(db, batch_size=settings.CHECKIN_BATCH_SIZE)
+    finally:
+        db.close()
+
+def start_up():
+    # MariaDB is initialised by migrations/init.sql; SQLite databases are created from the models
+    if is_sqlite(settings.DATABASE_URL):
+        init_db()
+    # Connect and load bcrypt before taking traffic rather than in the first requests
+    database.warm_pool(settings.DB_POOL_WARMUP)
+    load_hash_backend()
+    # Audit entries are written unsealed with each approval/transfer and sealed here in bulk
+    start_worker("audit-sealer", settings.AUDIT_SEAL_INTERVAL, seal_audit_log)
+    start_worker("checkin-scanner", settings.CHECKIN_SCAN_INTERVAL, scan_missed_checkins)
+
+def shut_down():
+    stop_workers()
+    database.dispose_engines()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_up()
+    try:
+        yield
+    finally:
+        shut_down()
 
 # Authentication endpoints
-@app.post("/auth/register", response_model=User, tags=["Authentication"])
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = user_crud.get_user_by_email(db, email=user.email)
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def too_many_requests(error: Throttled) -> HTTPException:
+    return HTTPException(status_code=429, detail=error.reason, headers={"Retry-After": str(error.retry_after)})
+
+def owner_moving(request: Request, error: OwnerMoving) -> JSONResponse:
+    # The owner's rows are read-only for the few seconds a shard move takes
+    return JSONResponse(status_code=503, content={"detail": str(error)}, headers={"Retry-After": str(error.retry_after)})
+
+@router.post("/auth/register", response_model=User, tags=["Authentication"])
+def register(user: UserCreate, request: Request, db: Session = Depends(get_db)):
+    throttle = get_throttle()
+    try:
+        throttle.check(client_ip(request))
+        db_user = user_crud.get_user_by_email(db, email=user.email)
+        if db_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        throttle.acquire_hash()
+    except Throttled as error:
+        raise too_many_requests(error)
     return user_crud.create_user(db=db, user=user)
 
-@app.post("/auth/login", response_model=Token, tags=["Authentication"])
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = user_crud.authenticate_user(db, email=user_data.email, password=user_data.password)
+@router.post("/auth/login", response_model=Token, tags=["Authentication"])
+def login(user_data: UserLogin, request: Request, db: Session = Depends(get_db)):
+    throttle = get_throttle()
+    try:
+        # Over-limit clients are turned away here, before any database or bcrypt work
+        throttle.check(client_ip(request), user_data.email)
+        user = user_crud.authenticate_user(
+            db, email=user_data.email, password=user_data.password, before_verify=throttle.acquire_hash
+        )
+    except Throttled as error:
+        raise too_many_requests(error)
     if not user:
+        throttle.failed(user_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    throttle.succeeded(user_data.email)
     access_token = create_access_token(data={"user_id": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.get("/auth/throttle/metrics", tags=["Authentication"])
+def login_throttle_metrics(current_user: UserModel = Depends(get_current_operator)):
+    """Counts of login/registration attempts admitted and rejected by the throttle since startup."""
+    return get_throttle().metrics()
+
 # User endpoints
-@app.get("/users/me", response_model=User, tags=["Users"])
+@router.get("/users/me", response_model=User, tags=["Users"])
 def read_users_me(current_user: UserModel = Depends(get_current_user)):
     return current_user
 
+@router.put("/users/me/checkin-settings", response_model=User, tags=["Users"])
+def update_checkin_settings(
+    checkin: CheckinSettings,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Set the dead man's switch interval in seconds, or null to turn it off.
+
+    If no check-in arrives within the interval, a pending ``missed_checkin`` death
+    verification is opened for the user.
+    """
+    return user_crud.update_checkin_settings(db, user_id=current_user.id, checkin_interval=checkin.checkin_interval)
+
+@router.post("/users/me/checkin", response_model=CheckinStatus, tags=["Users"])
+def check_in(
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.checkin_interval:
+        raise HTTPException(status_code=400, detail="Check-ins are not enabled")
+    return user_crud.check_in(db, current_user)
+
+@router.get("/users/me/inheritances", response_model=InheritancePage, tags=["Users"])
+def read_inheritances(
+    after: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Assets naming the current user as a beneficiary, with their owners and the status of
+    the latest death verification for each owner. Page with ``after=<next_after>``."""
+    rows = asset_crud.get_user_inheritances(db, user_id=current_user.id, after=after, limit=limit + 1)
+    items = rows[:limit]
+    next_after = items[-1].asset_id if len(rows) > limit else None
+    return {"items": items, "next_after": next_after}
+
 # Asset endpoints
-@app.post("/assets", response_model=DigitalAsset, tags=["Assets"])
+@router.post("/assets", response_model=DigitalAsset, tags=["Assets"])
 def create_asset(
     asset: DigitalAssetCreate,
     current_user: UserModel = Depends(get_current_user),
@@ -62,32 +169,49 @@ def create_asset(
 ):
     return asset_crud.create_asset(db=db, asset=asset, owner_id=current_user.id)
 
-@app.get("/assets", response_model=List[DigitalAsset], tags=["Assets"])
+@router.get("/assets", response_model=List[DigitalAsset], tags=["Assets"])
 def read_assets(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = None,
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return asset_crud.get_user_assets(db, user_id=current_user.id, skip=skip, limit=limit)
+    """List the current user's assets. Pass ``fields=id,name,asset_type`` to fetch and return only those columns."""
+    selected = parse_fields(fields, DigitalAsset)
+    assets = asset_crud.get_user_assets(db, user_id=current_user.id, skip=skip, limit=limit, fields=selected)
+    if selected is not None:
+        return sparse_response(DigitalAsset, [to_dict(asset, selected) for asset in assets], selected)
+    return assets
 
-@app.get("/assets/{asset_id}", response_model=DigitalAssetWithBeneficiaries, tags=["Assets"])
+@router.get("/assets/{asset_id}", response_model=DigitalAssetWithBeneficiaries, tags=["Assets"])
 def read_asset(
     asset_id: int,
+    fields: Optional[str] = None,
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    asset = asset_crud.get_asset(db, asset_id=asset_id)
+    selected = parse_fields(fields, DigitalAssetWithBeneficiaries)
+    asset = asset_crud.get_asset(db, asset_id=asset_id, fields=selected)
     if not asset or asset.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Asset not found")
     
+    if selected is not None:
+        content = to_dict(asset, [name for name in selected if name != "beneficiaries"])
+        if "beneficiaries" in selected:
+            content["beneficiaries"] = [
+                Beneficiary.model_validate(beneficiary)
+                for beneficiary in asset_crud.get_asset_beneficiaries(db, asset_id=asset_id)
+            ]
+        return sparse_response(DigitalAssetWithBeneficiaries, content, selected)
+
     beneficiaries = asset_crud.get_asset_beneficiaries(db, asset_id=asset_id)
     return DigitalAssetWithBeneficiaries(
         **asset.__dict__,
         beneficiaries=beneficiaries
     )
 
-@app.post("/assets/{asset_id}/beneficiaries", response_model=Beneficiary, tags=["Assets"])
+@router.post("/assets/{asset_id}/beneficiaries", response_model=Beneficiary, tags=["Assets"])
 def add_asset_beneficiary(
     asset_id: int,
     beneficiary: BeneficiaryCreate,
@@ -101,7 +225,7 @@ def add_asset_beneficiary(
     return asset_crud.add_beneficiary(db, asset_id=asset_id, beneficiary=beneficiary)
 
 # Death verification endpoints
-@app.post("/death-verifications", response_model=DeathVerification, tags=["Death Verification"])
+@router.post("/death-verifications", response_model=DeathVerification, tags=["Death Verification"])
 def create_death_verification(
     event: DeathVerificationCreate,
     current_user: UserModel = Depends(get_current_user),
@@ -109,51 +233,174 @@ def create_death_verification(
 ):
     return event_crud.create_death_verification(db, event=event, initiated_by=current_user.id)
 
-@app.post("/death-verifications/{event_id}/approvals", response_model=MultisigApproval, tags=["Death Verification"])
+@router.post("/death-verifications/{event_id}/approvals", response_model=MultisigApproval, tags=["Death Verification"])
 def add_death_verification_approval(
     event_id: int,
     approval: MultisigApprovalCreate,
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return event_crud.add_approval(db, event_id=event_id, approval=approval, approver_id=current_user.id)
+    try:
+        return event_crud.add_approval(db, event_id=event_id, approval=approval, approver_id=current_user.id)
+    except event_crud.ApprovalRefused as error:
+        raise HTTPException(status_code=error.status_code, detail=error.reason)
 
-@app.get("/death-verifications/{event_id}", response_model=DeathVerification, tags=["Death Verification"])
-def get_death_verification(event_id: int, db: Session = Depends(get_db)):
-    event = event_crud.get_death_verification(db, event_id)
+@router.post("/death-verifications/approvals/bulk", response_model=List[BulkApprovalResult], tags=["Death Verification"])
+def add_death_verification_approvals(
+    payload: BulkApprovalRequest,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Approve or reject many events at once; each item gets its own result, in request order."""
+    if len(payload.approvals) > settings.BULK_APPROVAL_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_APPROVAL_MAX_ITEMS} approvals per request")
+    return event_crud.add_approvals(db, payload.approvals, approver_id=current_user.id)
+
+@router.get("/death-verifications/{event_id}", response_model=DeathVerification, tags=["Death Verification"])
+def get_death_verification(event_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, DeathVerification)
+    event = event_crud.get_death_verification(db, event_id, fields=selected)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
+    if selected is not None:
+        return sparse_response(DeathVerification, to_dict(event, selected), selected)
     return event
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/death-verifications/{event_id}/events", tags=["Death Verification"])
+async def stream_death_verification(event_id: int, db: Session = Depends(get_db)):
+    """Server-Sent Events stream of approval progress; ends once the event is verified or rejected."""
+    # Subscribe before reading the snapshot so no change can slip in between
+    subscription = pubsub.get_broker().subscribe(pubsub.verification_topic(event_id))
+    try:
+        event = await run_in_threadpool(event_crud.get_death_verification, db, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        snapshot = event_crud.verification_message(event)["data"]
+    except Exception:
+        subscription.close()
+        raise
+    finally:
+        # Don't hold a pooled connection for the lifetime of the stream
+        db.close()
+
+    finished = ("verified", "rejected")
+    if snapshot["status"] in finished:
+        subscription.close()
+        return StreamingResponse(
+            iter([pubsub.format_sse(snapshot, event="verification")]),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+    return StreamingResponse(
+        pubsub.sse_stream(
+            subscription,
+            initial=pubsub.format_sse(snapshot, event="verification"),
+            until=lambda message: message["data"]["status"] in finished,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 # Transfer endpoints
-@app.get("/transfers", response_model=List[AssetTransfer], tags=["Transfers"])
+@router.get("/transfers", response_model=List[AssetTransfer], tags=["Transfers"])
 def read_transfers(
+    fields: Optional[str] = None,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    selected = parse_fields(fields, AssetTransfer)
+    transfers = event_crud.get_user_transfers(db, user_id=current_user.id, fields=selected)
+    if selected is not None:
+        return sparse_response(AssetTransfer, [to_dict(transfer, selected) for transfer in transfers], selected)
+    return transfers
+
+@router.get("/transfers/stream", tags=["Transfers"])
+async def stream_transfers(
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Server-Sent Events stream of transfers created to or from the current user."""
+    subscription = pubsub.get_broker().subscribe(pubsub.transfers_topic(current_user.id))
+    db.close()
+    return StreamingResponse(
+        pubsub.sse_stream(subscription),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@router.get("/transfers/{transfer_id}/proof", response_model=InclusionProof, tags=["Transfers"])
+def read_transfer_proof(
+    transfer_id: int,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Merkle inclusion proof that the transfer is in the sealed audit log.
+
+    Hash the sibling hashes in ``path`` onto ``leaf_hash`` to get ``merkle_root``. Entries are
+    sealed every few seconds; until then ``sealed`` is false and there is no path.
+    """
+    transfer = db.query(AssetTransferModel).filter(AssetTransferModel.id == transfer_id).first()
+    if not transfer or current_user.id not in (transfer.from_user_id, transfer.to_user_id):
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    proof = audit_crud.get_proof(db, "asset_transfer", transfer_id)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Transfer is not in the audit log")
+    proof["record_matches"] = proof["leaf_hash"] == audit_crud.transfer_leaf_hash(transfer)
+    return proof
+
+# Audit endpoints
+@router.get("/audit/verify", response_model=LogVerification, tags=["Audit"])
+def verify_audit_log(
+    full: bool = False,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Verify the audit log's Merkle roots and hash chain, reading only batches sealed since the last call.
+
+    ``full`` re-reads the whole log, so only operators may ask for it.
+    """
+    if full and not is_operator(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator access required")
+    return audit_crud.verify_log(db, full=full)
+
+# Batch endpoint
+@router.post("/batch", response_model=List[BatchResponseItem], tags=["Batch"])
+async def batch(
+    payload: BatchRequest,
+    request: Request,
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return db.query(AssetTransferModel).filter(
-        (AssetTransferModel.from_user_id == current_user.id) | 
-        (AssetTransferModel.to_user_id == current_user.id)
-    ).all()
+    """Run several API calls in one round trip.
+
+    Sub-requests are executed in order against the existing routes, authenticated once for
+    the whole batch. Consecutive GET sub-requests run concurrently. Each result carries the
+    sub-request's status code and JSON body.
+    """
+    # Detach the user so concurrent reads can use it without touching the shared session
+    db.expunge(current_user)
+    return await run_batch(request, payload.requests, db=db, user=current_user)
 
 # Demo endpoints for presentation
-@app.get("/demo/users", tags=["Demo"])
+@router.get("/demo/users", tags=["Demo"])
 def demo_get_users(db: Session = Depends(get_db)):
     """Returns all users for demo purposes."""
     return user_crud.get_users(db)
 
-@app.get("/demo/death-verifications", tags=["Demo"])
+@router.get("/demo/death-verifications", tags=["Demo"])
 def demo_get_death_verifications(db: Session = Depends(get_db)):
     """Returns all death verification events for demo purposes."""
     return db.query(DeathVerificationEvent).all()
 
-@app.get("/demo/asset-transfers", tags=["Demo"])
+@router.get("/demo/asset-transfers", tags=["Demo"])
 def demo_get_asset_transfers(db: Session = Depends(get_db)):
     """Returns all asset transfers for demo purposes."""
     return db.query(AssetTransferModel).all()
 
 # Root endpoint
-@app.get("/", tags=["Root"])
+@router.get("/", tags=["Root"])
 def read_root():
     return {
         "message": "Digital Legacy Vault API",
@@ -162,6 +409,40 @@ def read_root():
         "demo_script": "Run python demo_script.py to see the full workflow"
     }
 
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
+    """Build the API application.
+
+    ``app_settings`` (e.g. ``Settings(DATABASE_URL=...)``) overrides the process-wide settings.
+    Nothing connects to the database or loads bcrypt until the app starts up.
+    """
+    if app_settings is not None and app_settings is not settings:
+        vars(settings).update(vars(app_settings))
+        # Drop anything already built from the old settings
+        database.dispose_engines()
+        set_cache(None)
+        set_throttle(None)
+
+    app = FastAPI(
+        title="Digital Legacy Vault API",
+        description="A secure system for managing digital assets and automating transfers to beneficiaries upon verified death",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_exception_handler(OwnerMoving, owner_moving)
+    app.include_router(router)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Enum, JSON, TIMESTAMP, ForeignKey, DECIMAL
+from sqlalchemy import Column, Integer, String, Text, Boolean, Enum, JSON, TIMESTAMP, ForeignKey, DECIMAL, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class DigitalAsset(Base):
     __tablename__ = "digital_assets"
+    __table_args__ = (
+        Index("idx_assets_owner", "owner_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -22,6 +25,12 @@ class DigitalAsset(Base):
 
 class Beneficiary(Base):
     __tablename__ = "beneficiaries"
+    __table_args__ = (
+        UniqueConstraint("asset_id", "user_id", name="unique_asset_beneficiary"),
+        Index("idx_beneficiaries_asset", "asset_id"),
+        # Covers the beneficiary side of the inheritances view
+        Index("idx_beneficiaries_user", "user_id", "asset_id", "share_percentage", "approval_required"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("digital_assets.id"), nullable=False)
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Enum, TIMESTAMP, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class AuditLogEntry(Base):
+    __tablename__ = "audit_log_entries"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="unique_audit_entity"),
+        Index("idx_audit_entries_batch", "batch_id", "leaf_index"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(Enum('multisig_approval', 'asset_transfer'), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    # Estate owner; keeps the entry on the owner's shard
+    owner_id = Column(Integer, nullable=False)
+    leaf_hash = Column(String(64), nullable=False)
+    batch_id = Column(Integer, ForeignKey("audit_batches.id"))
+    leaf_index = Column(Integer)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+class AuditBatch(Base):
+    __tablename__ = "audit_batches"
+    __table_args__ = (
+        # Two batches chained onto the same predecessor would fork the log
+        UniqueConstraint("prev_hash", name="unique_audit_prev_hash"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    merkle_root = Column(String(64), nullable=False)
+    prev_hash = Column(String(64), nullable=False)
+    batch_hash = Column(String(64), nullable=False)
+    entry_count = Column(Integer, nullable=False)
+    first_entry_id = Column(Integer, nullable=False)
+    last_entry_id = Column(Integer, nullable=False)
+    sealed_at = Column(TIMESTAMP, server_default=func.now())
+
+class AuditChainState(Base):
+    """Head of the batch chain. One row (id 1) per database; sealers lock it to extend the chain one at a time.
+
+    ``verified_batch_id``/``verified_hash`` record how far ``verify_log`` has checked the chain.
+    """
+    __tablename__ = "audit_chain_state"
+
+    id = Column(Integer, primary_key=True)
+    head_batch_id = Column(Integer)
+    head_hash = Column(String(64), nullable=False)
+    verified_batch_id = Column(Integer)
+    verified_hash = Column(String(64))
@@ -1,15 +1,18 @@
-from sqlalchemy import Column, Integer, String, Enum, JSON, TIMESTAMP, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, Enum, JSON, TIMESTAMP, ForeignKey, Boolean, Text, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class DeathVerificationEvent(Base):
     __tablename__ = "death_verification_events"
+    __table_args__ = (
+        Index("idx_death_events_user", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(Enum('pending', 'verified', 'rejected', 'requires_more_evidence'), nullable=False)
-    verification_type = Column(Enum('death_certificate', 'multiple_witnesses', 'legal_document'), nullable=False)
+    verification_type = Column(Enum('death_certificate', 'multiple_witnesses', 'legal_document', 'missed_checkin'), nullable=False)
     evidence_data = Column(JSON)
     required_approvals = Column(Integer, default=1)
     current_approvals = Column(Integer, default=0)
@@ -24,6 +27,9 @@ class DeathVerificationEvent(Base):
 
 class MultisigApproval(Base):
     __tablename__ = "multisig_approvals"
+    __table_args__ = (
+        UniqueConstraint("event_id", "approver_id", name="unique_event_approver"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("death_verification_events.id"), nullable=False)
@@ -38,6 +44,9 @@ class MultisigApproval(Base):
 
 class AssetTransfer(Base):
     __tablename__ = "asset_transfers"
+    __table_args__ = (
+        Index("idx_transfers_asset", "asset_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("digital_assets.id"), nullable=False)
@@ -1,15 +1,24 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Boolean, Date, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("idx_users_next_due", "next_due_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
-    hashed_password = Column(String(255), nullable=False)
+    # Never copied into the read-through cache (see app/cache.py); loaded on access instead
+    hashed_password = Column(String(255), nullable=False, info={"cache": False})
     full_name = Column(String(255), nullable=False)
     date_of_birth = Column(Date)
     is_verified = Column(Boolean, default=False)
+    # Dead man's switch: seconds between check-ins; NULL disables it
+    checkin_interval = Column(Integer)
+    last_checkin_at = Column(TIMESTAMP, nullable=True)
+    # When the next check-in is due; cleared once a missed check-in has opened a verification
+    next_due_at = Column(TIMESTAMP, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+
+class Subscription:
+    """A subscriber's mailbox. Messages are pushed onto the subscriber's own event loop."""
+
+    def __init__(self, broker: "Broker", topic: str, loop: asyncio.AbstractEventLoop, maxsize: int = 100):
+        self.broker = broker
+        self.topic = topic
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message: Dict[str, Any]):
+        # Slow consumers drop their oldest message rather than blocking the publisher
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Base class for pub/sub backends. Publishers are synchronous so crud functions can call them."""
+
+    def publish(self, topic: str, message: Dict[str, Any]):
+        raise NotImplementedError
+
+    def subscribe(self, topic: str) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker: one publish is fanned out to every subscriber of the topic."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def publish(self, topic: str, message: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            # crud code runs in the threadpool, so hand the message over to the subscriber's loop
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Subscriber's loop is gone
+                self.unsubscribe(subscription)
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(self, topic, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+
+_broker: Broker = InMemoryBroker()
+
+
+def get_broker() -> Broker:
+    return _broker
+
+
+def set_broker(broker: Broker):
+    """Swap the backend, e.g. for a multi-worker broker."""
+    global _broker
+    _broker = broker
+
+
+def publish(topic: str, message: Dict[str, Any]):
+    _broker.publish(topic, message)
+
+
+# Topic names
+def verification_topic(event_id: int) -> str:
+    return f"death_verification:{event_id}"
+
+
+def transfers_topic(user_id: int) -> str:
+    return f"transfers:user:{user_id}"
+
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, default=str)}\n\n"
+    return message
+
+
+async def sse_stream(
+    subscription: Subscription,
+    initial: Optional[str] = None,
+    heartbeat: float = 15.0,
+    until=None,
+) -> AsyncIterator[str]:
+    """Yield SSE frames from a subscription, with comment heartbeats to keep proxies from closing the stream.
+
+    ``until`` is an optional predicate on a message; the stream ends after the first message it accepts.
+    """
+    try:
+        if initial:
+            yield initial
+        while True:
+            message = await subscription.get(timeout=heartbeat)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(message["data"], event=message.get("event"))
+            if until is not None and until(message):
+                break
+    finally:
+        subscription.close()
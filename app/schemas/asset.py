@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from enum import Enum
@@ -28,6 +28,8 @@ class DigitalAssetUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 class DigitalAsset(DigitalAssetBase):
+    # The ORM attribute is metadata_ ("metadata" is reserved on declarative models)
+    metadata: Optional[Dict[str, Any]] = Field(default=None, validation_alias=AliasChoices("metadata_", "metadata"))
     id: int
     owner_id: int
     is_active: bool
@@ -58,4 +60,26 @@ class DigitalAssetWithBeneficiaries(DigitalAsset):
     beneficiaries: List[Beneficiary] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class Inheritance(BaseModel):
+    asset_id: int
+    asset_name: str
+    asset_type: AssetType
+    is_active: bool
+    share_percentage: float
+    approval_required: bool
+    owner_id: int
+    owner_name: str
+    # Latest death verification opened for the owner, if any
+    verification_id: Optional[int] = None
+    verification_status: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class InheritancePage(BaseModel):
+    items: List[Inheritance]
+    # Pass as ``after`` to fetch the next page; null on the last page
+    next_after: Optional[int] = None
+
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class ProofStep(BaseModel):
+    position: str
+    hash: str
+
+class InclusionProof(BaseModel):
+    entity_type: str
+    entity_id: int
+    leaf_hash: str
+    sealed: bool
+    # Whether the record as stored now still hashes to the logged leaf
+    record_matches: bool
+    batch_id: Optional[int] = None
+    leaf_index: Optional[int] = None
+    merkle_root: Optional[str] = None
+    prev_hash: Optional[str] = None
+    batch_hash: Optional[str] = None
+    entry_count: Optional[int] = None
+    path: List[ProofStep] = []
+
+class VerificationError(BaseModel):
+    shard: Optional[str] = None
+    batch_id: int
+    error: str
+
+class LogVerification(BaseModel):
+    valid: bool
+    batches_verified: int
+    entries_verified: int
+    errors: List[VerificationError] = []
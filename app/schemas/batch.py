@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional, Any, List, Dict
+from enum import Enum
+
+class BatchMethod(str, Enum):
+    GET = "GET"
+    POST = "POST"
+    PUT = "PUT"
+    PATCH = "PATCH"
+    DELETE = "DELETE"
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    method: BatchMethod
+    path: str
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
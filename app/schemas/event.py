@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from enum import Enum
@@ -13,6 +13,7 @@ class VerificationType(str, Enum):
     DEATH_CERTIFICATE = "death_certificate"
     MULTIPLE_WITNESSES = "multiple_witnesses"
     LEGAL_DOCUMENT = "legal_document"
+    MISSED_CHECKIN = "missed_checkin"
 
 class ApprovalStatus(str, Enum):
     APPROVED = "approved"
@@ -60,6 +61,7 @@ class AssetTransferBase(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 class AssetTransfer(AssetTransferBase):
+    metadata: Optional[Dict[str, Any]] = Field(default=None, validation_alias=AliasChoices("metadata_", "metadata"))
     id: int
     asset_id: int
     from_user_id: int
@@ -70,4 +72,20 @@ class AssetTransfer(AssetTransferBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BulkApprovalItem(MultisigApprovalCreate):
+    event_id: int
+
+class BulkApprovalRequest(BaseModel):
+    approvals: List[BulkApprovalItem]
+
+class BulkApprovalResult(BaseModel):
+    event_id: int
+    ok: bool
+    error: Optional[str] = None
+    approval_id: Optional[int] = None
+    status: Optional[VerificationStatus] = None
+    current_approvals: Optional[int] = None
+    required_approvals: Optional[int] = None
+    transfers_triggered: bool = False
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import date, datetime
 from typing import Optional
 
@@ -18,12 +18,23 @@ class UserUpdate(BaseModel):
 class User(UserBase):
     id: int
     is_verified: bool
+    checkin_interval: Optional[int] = None
+    last_checkin_at: Optional[datetime] = None
+    next_due_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class CheckinSettings(BaseModel):
+    # Seconds between check-ins; null turns the dead man's switch off
+    checkin_interval: Optional[int] = Field(default=None, ge=60)
+
+class CheckinStatus(BaseModel):
+    last_checkin_at: datetime
+    next_due_at: datetime
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,580 @@
+"""Horizontal sharding keyed by owner (``users.id``).
+
+Every row belongs to one owner and lives on that owner's shard: the user row itself, their
+assets and those assets' beneficiaries, death verification events about them with their
+approvals, and transfers out of their estate. ``ShardRouter`` builds a SQLAlchemy
+``ShardedSession`` that routes each statement issued by the crud functions:
+
+- inserts go to the owner's shard,
+- queries that pin an owner column (``owner_id``, ``user_id`` ...) hit that one shard,
+- everything else (lookups by primary key, by beneficiary, by ``to_user_id``) is
+  scatter-gathered across all shards and the results are merged.
+
+Owners are placed by id: shard ``k`` of ``N`` allocates ids with ``(id - 1) % N == k``.
+Owners moved by the rebalance tool are recorded in the shard map file, which overrides
+the default placement. While an owner is being moved the map also marks them frozen, and
+writes to their rows raise ``OwnerMoving`` (served as 503 with Retry-After).
+
+Configure with ``SHARD_URLS`` (comma-separated database URLs) and ``SHARD_MAP_FILE``.
+
+    python -m app.sharding move --owner 42 --to 1
+    python -m app.sharding split --source 0 --to 2 --fraction 0.5
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, event, inspect, select, func, literal, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from app import cache
+from app.config import settings
+from app.database import is_sqlite, make_engine
+from app.models.user import User
+from app.models.asset import DigitalAsset, Beneficiary
+from app.models.event import DeathVerificationEvent, MultisigApproval, AssetTransfer
+
+# Columns that identify the owning user in a WHERE clause
+OWNER_COLUMNS = {
+    User.__table__.c.id,
+    DigitalAsset.__table__.c.owner_id,
+    DeathVerificationEvent.__table__.c.user_id,
+    AssetTransfer.__table__.c.from_user_id,
+}
+
+# Tables in the order an owner's rows are copied (parents first)
+OWNER_TABLES = [
+    User.__table__,
+    DigitalAsset.__table__,
+    Beneficiary.__table__,
+    DeathVerificationEvent.__table__,
+    MultisigApproval.__table__,
+    AssetTransfer.__table__,
+]
+
+
+class OwnerMoving(Exception):
+    """A write touched an owner whose rows are being copied to another shard."""
+
+    def __init__(self, owner_id: int, retry_after: int = 5):
+        super().__init__(f"Owner {owner_id} is being moved to another shard")
+        self.owner_id = owner_id
+        self.retry_after = retry_after
+
+
+class ShardMap:
+    """Owner id -> shard id, plus the owners frozen for a move.
+
+    Written by the rebalance tool and re-read by every process when the file changes, at
+    most ``reload_interval`` seconds late.
+    """
+
+    def __init__(self, shard_ids: List[str], path: Optional[str] = None, reload_interval: float = 1.0):
+        self.shard_ids = shard_ids
+        self.path = path
+        self.reload_interval = reload_interval
+        self._overrides: Dict[int, str] = {}
+        self._frozen: Set[int] = set()
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with open(self.path) as handle:
+            data = json.load(handle)
+        self._overrides = {int(owner): shard for owner, shard in data.get("owners", {}).items()}
+        self._frozen = set(data.get("frozen", []))
+        self._mtime = mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked >= self.reload_interval:
+            with self._lock:
+                self._checked = now
+                self._reload()
+
+    def home_shard(self, owner_id: int) -> str:
+        return self.shard_ids[(owner_id - 1) % len(self.shard_ids)]
+
+    def shard_for_owner(self, owner_id: int) -> str:
+        self._maybe_reload()
+        return self._overrides.get(owner_id) or self.home_shard(owner_id)
+
+    def shard_for_new_user(self, email: str) -> str:
+        return self.shard_ids[zlib.crc32(email.lower().encode()) % len(self.shard_ids)]
+
+    def is_frozen(self, owner_id: int) -> bool:
+        self._maybe_reload()
+        return owner_id in self._frozen
+
+    def has_frozen(self) -> bool:
+        self._maybe_reload()
+        return bool(self._frozen)
+
+    def freeze(self, owner_ids: Iterable[int]):
+        """Make owners read-only until ``assign`` moves them."""
+        def change(overrides, frozen):
+            frozen.update(owner_ids)
+        self._write(change)
+
+    def thaw(self, owner_ids: Iterable[int]):
+        """Lift the freeze without moving, after a failed move."""
+        def change(overrides, frozen):
+            frozen.difference_update(owner_ids)
+        self._write(change)
+
+    def assign(self, owner_ids: Iterable[int], shard_id: str):
+        """Record a move and lift the freeze."""
+        def change(overrides, frozen):
+            for owner_id in owner_ids:
+                frozen.discard(owner_id)
+                if shard_id == self.home_shard(owner_id):
+                    overrides.pop(owner_id, None)
+                else:
+                    overrides[owner_id] = shard_id
+        self._write(change)
+
+    def _write(self, change):
+        """Apply ``change`` to a copy of the map and replace the file atomically, so readers never see a partial map."""
+        with self._lock:
+            self._reload()
+            overrides, frozen = dict(self._overrides), set(self._frozen)
+            change(overrides, frozen)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as handle:
+                json.dump({
+                    "owners": {str(owner): shard for owner, shard in sorted(overrides.items())},
+                    "frozen": sorted(frozen),
+                }, handle)
+            os.replace(tmp, self.path)
+            self._overrides, self._frozen = overrides, frozen
+            self._mtime = os.path.getmtime(self.path)
+
+
+# Next id per table on each SQLite shard (see IdAllocator); not part of the app's schema
+ID_SEQUENCES = Table(
+    "shard_id_sequences",
+    MetaData(),
+    Column("table_name", String(64), primary_key=True),
+    Column("next_id", Integer, nullable=False),
+)
+
+
+class IdAllocator:
+    """Hands out ids with ``(id - 1) % N == k`` on shard k.
+
+    MariaDB shards get this from ``auto_increment_increment``/``auto_increment_offset`` on
+    each connection; SQLite has no equivalent, so ids are reserved from the shard's
+    ``shard_id_sequences`` table before insert. The reservation is a write in the caller's
+    transaction, which SQLite serializes across processes until it commits.
+    """
+
+    def __init__(self, shard_ids: List[str]):
+        self.shard_ids = shard_ids
+
+    def next_ids(self, session, shard_id: str, table, count: int = 1) -> List[int]:
+        if count == 0:
+            return []
+        bind = {"shard_id": shard_id}
+        # First use on this shard: start after the rows already there
+        session.execute(
+            sqlite_insert(ID_SEQUENCES)
+            .from_select(
+                ["table_name", "next_id"],
+                # WHERE avoids SQLite's parsing ambiguity between SELECT ... and ON CONFLICT
+                select(literal(table.name), func.coalesce(func.max(table.c.id), 0) + 1).where(true()),
+            )
+            .on_conflict_do_nothing(),
+            bind_arguments=bind,
+        )
+        current = session.execute(
+            select(ID_SEQUENCES.c.next_id).where(ID_SEQUENCES.c.table_name == table.name), bind_arguments=bind
+        ).scalar()
+        first = self._align(current, shard_id)
+        ids = list(range(first, first + count * len(self.shard_ids), len(self.shard_ids)))
+        session.execute(
+            ID_SEQUENCES.update().where(ID_SEQUENCES.c.table_name == table.name).values(next_id=ids[-1] + 1),
+            bind_arguments=bind,
+        )
+        return ids
+
+    def _align(self, value: int, shard_id: str) -> int:
+        offset = self.shard_ids.index(shard_id)
+        count = len(self.shard_ids)
+        return value + (offset - (value - 1)) % count
+
+
+class OwnerShardedSession(ShardedSession):
+    def __init__(self, router: "ShardRouter", **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, *, shard_id=None, instance=None, clause=None, **kw):
+        # Textual SQL and other statements without a mapper go to the first shard
+        if shard_id is None and mapper is None and instance is None:
+            shard_id = self.router.shard_ids[0]
+        return super().get_bind(mapper, shard_id=shard_id, instance=instance, clause=clause, **kw)
+
+
+class ShardRouter:
+    def __init__(self, urls: List[str], map_path: Optional[str] = None, engine_factory=None):
+        engine_factory = engine_factory or make_engine
+        self.shard_ids = [str(index) for index in range(len(urls))]
+        self.engines = {}
+        for shard_id, url in zip(self.shard_ids, urls):
+            # Beneficiaries, approvers and transfer recipients can live on other shards,
+            # so cross-owner foreign keys can't be enforced
+            if is_sqlite(url):
+                engine = engine_factory(url, enforce_foreign_keys=False)
+                ID_SEQUENCES.metadata.create_all(engine)
+            else:
+                engine = engine_factory(url)
+                self._stride_auto_increment(engine, shard_id)
+            self.engines[shard_id] = engine
+        self.sqlite_shards = {shard_id for shard_id, url in zip(self.shard_ids, urls) if is_sqlite(url)}
+        self.shard_map = ShardMap(self.shard_ids, map_path)
+        self.allocator = IdAllocator(self.shard_ids)
+        self.sessionmaker = sessionmaker(
+            class_=OwnerShardedSession,
+            autocommit=False,
+            autoflush=False,
+            shards=self.engines,
+            shard_chooser=self.shard_chooser,
+            identity_chooser=self.identity_chooser,
+            execute_chooser=self.execute_chooser,
+            router=self,
+        )
+        event.listen(self.sessionmaker, "before_flush", self._assign_shards)
+
+    def _stride_auto_increment(self, engine, shard_id: str):
+        increment = len(self.shard_ids)
+        offset = self.shard_ids.index(shard_id) + 1
+
+        @event.listens_for(engine, "connect")
+        def _set_stride(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET SESSION auto_increment_increment = {increment}, auto_increment_offset = {offset}")
+            cursor.close()
+
+    # Placement of new rows
+    def owner_of(self, session, instance) -> Optional[int]:
+        if isinstance(instance, User):
+            return instance.id
+        if isinstance(instance, DigitalAsset):
+            return instance.owner_id
+        if isinstance(instance, DeathVerificationEvent):
+            return instance.user_id
+        if isinstance(instance, AssetTransfer):
+            return instance.from_user_id
+        if isinstance(instance, Beneficiary):
+            asset = instance.asset or session.get(DigitalAsset, instance.asset_id)
+            return asset.owner_id
+        if isinstance(instance, MultisigApproval):
+            verification = instance.event or session.get(DeathVerificationEvent, instance.event_id)
+            return verification.user_id
+        return getattr(instance, "owner_id", None)
+
+    def shard_for_instance(self, session, instance) -> str:
+        if isinstance(instance, User) and instance.id is None:
+            return self.shard_map.shard_for_new_user(instance.email)
+        owner_id = self.owner_of(session, instance)
+        if owner_id is None:
+            return self.shard_ids[0]
+        return self.shard_map.shard_for_owner(owner_id)
+
+    def check_writable(self, owner_ids: Iterable[Optional[int]]):
+        for owner_id in owner_ids:
+            if owner_id is not None and self.shard_map.is_frozen(owner_id):
+                raise OwnerMoving(owner_id)
+
+    def _assign_shards(self, session, flush_context, instances):
+        with session.no_autoflush:
+            if self.shard_map.has_frozen():
+                changed = list(session.new) + list(session.dirty) + list(session.deleted)
+                self.check_writable(self.owner_of(session, instance) for instance in changed)
+            needs_ids: Dict[tuple, list] = {}
+            for instance in list(session.new):
+                state = inspect(instance)
+                if state.identity_token is None:
+                    state.identity_token = self.shard_for_instance(session, instance)
+                if state.identity_token in self.sqlite_shards and getattr(instance, "id", 0) is None:
+                    needs_ids.setdefault((state.identity_token, state.mapper.local_table), []).append(instance)
+            for (shard_id, table), pending in needs_ids.items():
+                for instance, new_id in zip(pending, self.allocator.next_ids(session, shard_id, table, len(pending))):
+                    instance.id = new_id
+
+    # ShardedSession hooks
+    def shard_chooser(self, mapper, instance, clause=None, **kw):
+        if instance is None:
+            return self.shard_ids[0]
+        return self.shard_for_instance(inspect(instance).session, instance)
+
+    def identity_chooser(self, mapper, primary_key, *, lazy_loaded_from, execution_options, bind_arguments, **kw):
+        if mapper.class_ is User:
+            return [self.shard_map.shard_for_owner(primary_key[0])]
+        if lazy_loaded_from is not None and lazy_loaded_from.identity_token is not None:
+            # Related rows are usually on the same shard as the row they're loaded from
+            first = lazy_loaded_from.identity_token
+            return [first] + [shard_id for shard_id in self.shard_ids if shard_id != first]
+        return self.shard_ids
+
+    def execute_chooser(self, orm_context) -> Iterable[str]:
+        owners = owner_criteria(orm_context.statement)
+        if owners and (orm_context.is_update or orm_context.is_delete):
+            self.check_writable(owners)
+        if owners:
+            return sorted({self.shard_map.shard_for_owner(owner_id) for owner_id in owners})
+        # Cross-owner query: scatter to every shard and merge the results
+        return self.shard_ids
+
+    def shard_for_owner(self, owner_id: int) -> str:
+        return self.shard_map.shard_for_owner(owner_id)
+
+
+def owner_criteria(statement) -> List[int]:
+    """Owner ids pinned by top-level ``owner_column == value`` / ``IN`` terms of the WHERE clause."""
+    where = getattr(statement, "whereclause", None)
+    if where is None:
+        return []
+    terms = list(where.clauses) if isinstance(where, BooleanClauseList) and where.operator is operators.and_ else [where]
+    for term in terms:
+        if not isinstance(term, BinaryExpression) or term.left not in OWNER_COLUMNS:
+            continue
+        if not isinstance(term.right, BindParameter):
+            continue
+        value = term.right.effective_value
+        if term.operator is operators.eq and value is not None:
+            return [value]
+        if term.operator is operators.in_op and value:
+            return list(value)
+    return []
+
+
+def shard_options(session, owner_id: int) -> dict:
+    """Execution options pinning a Core-style ORM statement to an owner's shard; empty when not sharded."""
+    router = getattr(session, "router", None)
+    if router is None:
+        return {}
+    return {"_sa_shard_id": router.shard_for_owner(owner_id)}
+
+
+def check_writable(session, owner_ids: Iterable[int]):
+    """Raise ``OwnerMoving`` if any of the owners is frozen for a move; for writes the flush hook can't see."""
+    router = getattr(session, "router", None)
+    if router is not None:
+        router.check_writable(owner_ids)
+
+
+def session_shards(session) -> List[Optional[str]]:
+    """Shard ids for work that has to run on each shard in turn; ``[None]`` when not sharded."""
+    router = getattr(session, "router", None)
+    return list(router.shard_ids) if router is not None else [None]
+
+
+def on_shard(shard_id: Optional[str]) -> dict:
+    """Execution options pinning a statement to ``shard_id`` (from ``session_shards``)."""
+    return {"_sa_shard_id": shard_id} if shard_id is not None else {}
+
+
+def bulk_insert(session, shard_id: Optional[str], table, rows: List[dict]):
+    """Insert ``rows`` into ``table`` on ``shard_id`` with a single executemany.
+
+    ORM bulk inserts aren't supported by ``ShardedSession`` and plain inserts skip the flush
+    hook, so rows bound for a SQLite shard get their ids allocated here.
+    """
+    router = getattr(session, "router", None)
+    if router is None:
+        session.execute(table.insert(), rows)
+        return
+    if shard_id in router.sqlite_shards:
+        for row, new_id in zip(rows, router.allocator.next_ids(session, shard_id, table, len(rows))):
+            row["id"] = new_id
+    session.execute(table.insert(), rows, bind_arguments={"shard_id": shard_id})
+
+
+# Rebalancing
+def _owner_rows(connection, owner_id: int, table, batch_size: int):
+    """Yield an owner's rows of ``table`` in id-ordered batches."""
+    if table is User.__table__:
+        condition = table.c.id == owner_id
+    elif table is DigitalAsset.__table__:
+        condition = table.c.owner_id == owner_id
+    elif table is Beneficiary.__table__:
+        condition = table.c.asset_id.in_(
+            select(DigitalAsset.__table__.c.id).where(DigitalAsset.__table__.c.owner_id == owner_id)
+        )
+    elif table is DeathVerificationEvent.__table__:
+        condition = table.c.user_id == owner_id
+    elif table is MultisigApproval.__table__:
+        condition = table.c.event_id.in_(
+            select(DeathVerificationEvent.__table__.c.id).where(DeathVerificationEvent.__table__.c.user_id == owner_id)
+        )
+    elif table is AssetTransfer.__table__:
+        condition = table.c.from_user_id == owner_id
+    else:
+        condition = table.c.owner_id == owner_id
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(table).where(condition, table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return
+        yield [dict(row) for row in rows]
+        last_id = rows[-1]["id"]
+
+
+def _sync_owner(source_connection, target_connection, owner_id: int, batch_size: int) -> int:
+    """Make the owner's rows on the target match the source: insert new rows, update changed
+    ones and delete ones that are gone from the source. Returns the number of rows written."""
+    written = 0
+    stale = {}
+    for table in OWNER_TABLES:
+        source_ids = set()
+        for batch in _owner_rows(source_connection, owner_id, table, batch_size):
+            ids = [row["id"] for row in batch]
+            source_ids.update(ids)
+            current = {
+                row["id"]: dict(row)
+                for row in target_connection.execute(select(table).where(table.c.id.in_(ids))).mappings()
+            }
+            new = [row for row in batch if row["id"] not in current]
+            if new:
+                target_connection.execute(table.insert(), new)
+            for row in batch:
+                if row["id"] in current and current[row["id"]] != row:
+                    target_connection.execute(table.update().where(table.c.id == row["id"]).values(row))
+                    written += 1
+            written += len(new)
+        stale[table] = [
+            row["id"] for batch in _owner_rows(target_connection, owner_id, table, batch_size)
+            for row in batch if row["id"] not in source_ids
+        ]
+    # Children first
+    for table in reversed(OWNER_TABLES):
+        ids = stale[table]
+        for start in range(0, len(ids), batch_size):
+            target_connection.execute(table.delete().where(table.c.id.in_(ids[start:start + batch_size])))
+        written += len(ids)
+    return written
+
+
+def _propagation_delay(router: ShardRouter) -> float:
+    """How long until every process has re-read the shard map and dropped cached rows."""
+    cache_ttl = settings.CACHE_LOCAL_TTL if settings.CACHE_ENABLED else 0.0
+    return max(router.shard_map.reload_interval, cache_ttl)
+
+
+def move_owners(router: ShardRouter, owner_ids: List[int], target: str, batch_size: int = 1000,
+                settle: float = 1.0) -> int:
+    """Move owners to ``target`` while the app keeps serving. Returns the number of rows written.
+
+    1. Copy each owner's rows while they are still writable.
+    2. Freeze the owners in the shard map and wait until every process has seen it, plus
+       ``settle`` seconds for transactions that passed the check to commit.
+    3. Sync again (upserting changed rows, deleting removed ones) with no writes in flight.
+    4. Switch the map, which also lifts the freeze.
+    5. Wait until every process routes to ``target`` and has dropped cached rows that
+       point at the source, then delete the originals.
+    """
+    moves = {}
+    for owner_id in owner_ids:
+        source = router.shard_for_owner(owner_id)
+        if source != target:
+            moves[owner_id] = source
+    if not moves:
+        return 0
+    target_engine = router.engines[target]
+
+    def sync():
+        written = 0
+        for owner_id, source in moves.items():
+            with router.engines[source].connect() as source_connection, target_engine.begin() as target_connection:
+                written += _sync_owner(source_connection, target_connection, owner_id, batch_size)
+        return written
+
+    copied = sync()
+    router.shard_map.freeze(moves)
+    try:
+        time.sleep(router.shard_map.reload_interval + settle)
+        copied += sync()
+    except BaseException:
+        router.shard_map.thaw(moves)
+        raise
+    router.shard_map.assign(moves, target)
+    # Cached rows remember the shard they were read from
+    cache.invalidate_all()
+    time.sleep(_propagation_delay(router) + settle)
+
+    for owner_id, source in moves.items():
+        with router.engines[source].begin() as connection:
+            for table in reversed(OWNER_TABLES):
+                ids = [row["id"] for batch in _owner_rows(connection, owner_id, table, batch_size) for row in batch]
+                for start in range(0, len(ids), batch_size):
+                    connection.execute(table.delete().where(table.c.id.in_(ids[start:start + batch_size])))
+    return copied
+
+
+def move_owner(router: ShardRouter, owner_id: int, target: str, batch_size: int = 1000, settle: float = 1.0) -> int:
+    """Move one owner's rows to ``target``; see ``move_owners``."""
+    return move_owners(router, [owner_id], target, batch_size, settle)
+
+
+def split_shard(router: ShardRouter, source: str, target: str, fraction: float = 0.5, batch_size: int = 1000,
+                group_size: int = 100, settle: float = 1.0) -> int:
+    """Move ``fraction`` of the owners currently on ``source`` to ``target``, ``group_size`` at a time."""
+    with router.engines[source].connect() as connection:
+        owners = [row[0] for row in connection.execute(select(User.__table__.c.id).order_by(User.__table__.c.id))]
+    owners = owners[:int(len(owners) * fraction)]
+    for start in range(0, len(owners), group_size):
+        move_owners(router, owners[start:start + group_size], target, batch_size, settle)
+    return len(owners)
+
+
+def main():
+    from app.database import get_router
+
+    parser = argparse.ArgumentParser(description="Move owners between shards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    move = commands.add_parser("move", help="move one owner to another shard")
+    move.add_argument("--owner", type=int, required=True)
+    move.add_argument("--to", required=True)
+    split = commands.add_parser("split", help="move a fraction of a shard's owners to another shard")
+    split.add_argument("--source", required=True)
+    split.add_argument("--to", required=True)
+    split.add_argument("--fraction", type=float, default=0.5)
+    split.add_argument("--group-size", type=int, default=100, help="owners frozen and switched together")
+    for command in (move, split):
+        command.add_argument("--batch-size", type=int, default=1000)
+        command.add_argument("--settle", type=float, default=1.0,
+                             help="extra seconds to wait for in-flight writes and map reloads")
+    args = parser.parse_args()
+
+    router = get_router()
+    if router is None:
+        parser.error("SHARD_URLS is not configured")
+    if args.command == "move":
+        copied = move_owner(router, args.owner, args.to, args.batch_size, args.settle)
+        print(f"Moved owner {args.owner} to shard {args.to} ({copied} rows)")
+    else:
+        moved = split_shard(router, args.source, args.to, args.fraction, args.batch_size, args.group_size, args.settle)
+        print(f"Moved {moved} owners from shard {args.source} to shard {args.to}")
+
+
+if __name__ == "__main__":
+    main()
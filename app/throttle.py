@@ -0,0 +1,282 @@
+"""Login throttling.
+
+Checked in front of the bcrypt work in ``/auth/login`` and ``/auth/register``:
+
+- a sliding-window counter of attempts per client IP,
+- a sliding-window counter of failed logins per email,
+- a global token bucket on password hash operations, so bursts can't saturate every worker.
+
+Rejections are decided from counters alone, before any database or bcrypt work. Counters
+live in a ``ThrottleStore``: ``MemoryThrottleStore`` for a single process, or
+``SQLiteThrottleStore`` as a stand-in for a shared store across processes on one host.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.config import settings
+
+
+class Throttled(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def _window_count(window_start: float, current: int, previous: int, window: float, now: float) -> float:
+    # Sliding window estimated from two fixed windows: the previous one is weighted by how
+    # much of it still overlaps the sliding window
+    elapsed = (now - window_start) / window
+    return previous * max(0.0, 1.0 - elapsed) + current
+
+
+class ThrottleStore:
+    """Base class for counter storage."""
+
+    def hit(self, key: str, window: float, now: float) -> float:
+        """Count one event for ``key`` and return the sliding-window count including it."""
+        raise NotImplementedError
+
+    def peek(self, key: str, window: float, now: float) -> float:
+        raise NotImplementedError
+
+    def reset(self, key: str):
+        raise NotImplementedError
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """Take a token from a bucket; returns 0 on success, else seconds until one is available."""
+        raise NotImplementedError
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """Counters in this process. At most ``max_keys`` windows are kept; the least recently hit go first."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [window start, count in current window, count in previous window, window], least recently hit first
+        self._windows: "OrderedDict[str, list]" = OrderedDict()
+        self._buckets: Dict[str, tuple] = {}
+
+    def _roll(self, key: str, window: float, now: float) -> list:
+        start = now - now % window
+        entry = self._windows.get(key)
+        if entry is None or entry[0] < start - window:
+            entry = self._windows[key] = [start, 0, 0, window]
+        elif entry[0] < start:
+            entry[:3] = [start, 0, entry[1]]
+        return entry
+
+    def hit(self, key, window, now):
+        with self._lock:
+            entry = self._roll(key, window, now)
+            entry[1] += 1
+            self._windows.move_to_end(key)
+            # Idle keys reach the front first, and most have already rolled down to zero
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+            return _window_count(entry[0], entry[1], entry[2], window, now)
+
+    def peek(self, key, window, now):
+        with self._lock:
+            if key not in self._windows:
+                return 0.0
+            entry = self._roll(key, window, now)
+            return _window_count(entry[0], entry[1], entry[2], window, now)
+
+    def reset(self, key):
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def take(self, key, rate, burst, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+
+class SQLiteThrottleStore(ThrottleStore):
+    """Counters in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle_windows "
+                "(key TEXT PRIMARY KEY, start REAL, current INTEGER, previous INTEGER)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle_buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _roll(self, connection, key, window, now):
+        start = now - now % window
+        row = connection.execute(
+            "SELECT start, current, previous FROM throttle_windows WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] < start - window:
+            return start, 0, 0
+        if row[0] < start:
+            return start, 0, row[1]
+        return row
+
+    def hit(self, key, window, now):
+        with self._transaction() as connection:
+            start, current, previous = self._roll(connection, key, window, now)
+            current += 1
+            connection.execute(
+                "INSERT OR REPLACE INTO throttle_windows (key, start, current, previous) VALUES (?, ?, ?, ?)",
+                (key, start, current, previous),
+            )
+            return _window_count(start, current, previous, window, now)
+
+    def peek(self, key, window, now):
+        start, current, previous = self._roll(self._connection(), key, window, now)
+        return _window_count(start, current, previous, window, now)
+
+    def reset(self, key):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM throttle_windows WHERE key = ?", (key,))
+
+    def take(self, key, rate, burst, now):
+        with self._transaction() as connection:
+            row = connection.execute("SELECT tokens, updated FROM throttle_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens < 1:
+                wait = (1 - tokens) / rate
+            else:
+                tokens -= 1
+            connection.execute(
+                "INSERT OR REPLACE INTO throttle_buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now)
+            )
+            return wait
+
+
+class LoginThrottle:
+    def __init__(
+        self,
+        store: ThrottleStore,
+        ip_limit: int = 30,
+        ip_window: float = 60,
+        email_limit: int = 5,
+        email_window: float = 300,
+        hash_rate: float = 10,
+        hash_burst: float = 20,
+    ):
+        self.store = store
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self.email_limit = email_limit
+        self.email_window = email_window
+        self.hash_rate = hash_rate
+        self.hash_burst = hash_burst
+        self._metrics = Counter()
+        self._metrics_lock = threading.Lock()
+
+    def _count(self, metric: str):
+        with self._metrics_lock:
+            self._metrics[metric] += 1
+
+    def _retry_after(self, window: float, now: float) -> float:
+        return window - now % window
+
+    def check(self, ip: str, email: Optional[str] = None):
+        """Count an attempt from ``ip`` and raise ``Throttled`` if the IP or email is over its limit."""
+        now = time.time()
+        if self.store.hit(f"ip:{ip}", self.ip_window, now) > self.ip_limit:
+            self._count("rejected_ip")
+            raise Throttled("Too many attempts from this address", self._retry_after(self.ip_window, now))
+        if email is not None and self.store.peek(f"email:{email.lower()}", self.email_window, now) >= self.email_limit:
+            self._count("rejected_email")
+            raise Throttled("Too many failed logins for this account", self._retry_after(self.email_window, now))
+        self._count("admitted")
+
+    def acquire_hash(self):
+        """Take a token from the global password-hashing budget or raise ``Throttled``."""
+        wait = self.store.take("hash", self.hash_rate, self.hash_burst, time.time())
+        if wait:
+            self._count("rejected_hash")
+            raise Throttled("Too many login attempts, try again shortly", wait)
+        self._count("hashes")
+
+    def failed(self, email: str):
+        self._count("failed")
+        self.store.hit(f"email:{email.lower()}", self.email_window, time.time())
+
+    def succeeded(self, email: str):
+        self._count("succeeded")
+        self.store.reset(f"email:{email.lower()}")
+
+    def metrics(self) -> Dict[str, int]:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        for name in ("admitted", "hashes", "rejected_ip", "rejected_email", "rejected_hash", "failed", "succeeded"):
+            metrics.setdefault(name, 0)
+        metrics["rejected"] = metrics["rejected_ip"] + metrics["rejected_email"] + metrics["rejected_hash"]
+        return metrics
+
+
+def _store_from_settings() -> ThrottleStore:
+    backend = settings.LOGIN_THROTTLE_BACKEND
+    if backend.startswith("sqlite:"):
+        return SQLiteThrottleStore(backend[len("sqlite:"):])
+    if backend in ("", "memory"):
+        return MemoryThrottleStore()
+    raise ValueError(f"Unknown LOGIN_THROTTLE_BACKEND: {backend}")
+
+
+_throttle: Optional[LoginThrottle] = None
+
+def get_throttle() -> LoginThrottle:
+    global _throttle
+    if _throttle is None:
+        _throttle = LoginThrottle(
+            _store_from_settings(),
+            ip_limit=settings.LOGIN_IP_LIMIT,
+            ip_window=settings.LOGIN_IP_WINDOW,
+            email_limit=settings.LOGIN_EMAIL_LIMIT,
+            email_window=settings.LOGIN_EMAIL_WINDOW,
+            hash_rate=settings.LOGIN_HASH_RATE,
+            hash_burst=settings.LOGIN_HASH_BURST,
+        )
+    return _throttle
+
+def set_throttle(throttle: Optional[LoginThrottle]):
+    global _throttle
+    _throttle = throttle
@@ -0,0 +1,58 @@
+# app/utils/fields.py
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import load_only
+
+# Response field name -> mapped attribute, where they differ
+# ("metadata" is reserved on declarative models)
+ATTRIBUTE_MAP = {"metadata": "metadata_"}
+
+
+def parse_fields(fields: Optional[str], schema, extra: Iterable[str] = ()) -> Optional[List[str]]:
+    """Parse a ``fields=a,b,c`` query parameter against a response schema.
+
+    Returns None when no sparse fieldset was requested. ``id`` is always included.
+    """
+    if fields is None:
+        return None
+    allowed = set(schema.model_fields) | set(extra)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return list(dict.fromkeys(requested))
+
+
+def load_columns(model, fields: Optional[List[str]], required: Iterable[str] = ()):
+    """Build a ``load_only`` option so unrequested columns are never fetched."""
+    names = [ATTRIBUTE_MAP.get(name, name) for name in fields or ()] + list(required)
+    attributes = [getattr(model, name) for name in dict.fromkeys(names) if _is_column(model, name)]
+    return load_only(*attributes)
+
+
+def _is_column(model, name: str) -> bool:
+    return name in model.__mapper__.column_attrs
+
+
+def to_dict(obj, fields: List[str]) -> Dict:
+    return {name: getattr(obj, ATTRIBUTE_MAP.get(name, name)) for name in fields}
+
+
+def sparse_response(schema, content, fields: List[str]) -> JSONResponse:
+    """Serialize trimmed rows (from ``to_dict``) with the response schema, keeping only ``fields``.
+
+    Full responses go through the same schema as their ``response_model``, so both are
+    serialized alike. The rows only hold the loaded columns, so the models are built
+    without validation.
+    """
+    include = set(fields)
+
+    def dump(values: Dict):
+        return schema.model_construct(**values).model_dump(include=include, mode="json")
+
+    if isinstance(content, list):
+        return JSONResponse(content=[dump(values) for values in content])
+    return JSONResponse(content=dump(content))
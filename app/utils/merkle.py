@@ -0,0 +1,70 @@
+# app/utils/merkle.py
+"""Merkle trees as in RFC 6962: leaves and interior nodes are hashed with distinct prefixes,
+and a tree of n leaves splits at the largest power of two below n."""
+import hashlib
+import json
+from typing import Any, Dict, List
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def leaf_hash(record: Dict[str, Any]) -> str:
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return sha256(LEAF_PREFIX + canonical).hex()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return sha256(NODE_PREFIX + left + right)
+
+
+def _split(n: int) -> int:
+    k = 1
+    while k * 2 < n:
+        k *= 2
+    return k
+
+
+def _root(leaves: List[bytes]) -> bytes:
+    if len(leaves) == 1:
+        return leaves[0]
+    k = _split(len(leaves))
+    return node_hash(_root(leaves[:k]), _root(leaves[k:]))
+
+
+def merkle_root(leaf_hashes: List[str]) -> str:
+    return _root([bytes.fromhex(leaf) for leaf in leaf_hashes]).hex()
+
+
+def _path(leaves: List[bytes], index: int) -> List[Dict[str, str]]:
+    if len(leaves) == 1:
+        return []
+    k = _split(len(leaves))
+    if index < k:
+        return _path(leaves[:k], index) + [{"position": "right", "hash": _root(leaves[k:]).hex()}]
+    return _path(leaves[k:], index - k) + [{"position": "left", "hash": _root(leaves[:k]).hex()}]
+
+
+def inclusion_proof(leaf_hashes: List[str], index: int) -> List[Dict[str, str]]:
+    """Sibling hashes from the leaf up to the root; log2(n) entries."""
+    return _path([bytes.fromhex(leaf) for leaf in leaf_hashes], index)
+
+
+def verify_inclusion(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    node = bytes.fromhex(leaf)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = node_hash(sibling, node) if step["position"] == "left" else node_hash(node, sibling)
+    return node.hex() == root
+
+
+def chain_hash(prev_hash: str, root: str, entry_count: int) -> str:
+    """Links each sealed batch to the one before it."""
+    return sha256(bytes.fromhex(prev_hash) + bytes.fromhex(root) + entry_count.to_bytes(8, "big")).hex()
+
+
+GENESIS_HASH = "00" * 32
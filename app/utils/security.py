@@ -1,10 +1,25 @@
 # app/utils/security.py
-from passlib.context import CryptContext
+import threading
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+
+def get_pwd_context():
+    """The one password hashing context for the process, built on first use."""
+    global _pwd_context
+    with _pwd_context_lock:
+        if _pwd_context is None:
+            # passlib is only imported once a password is hashed or checked
+            from passlib.context import CryptContext
+            _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+def load_hash_backend():
+    """Load and self-test the bcrypt backend now instead of during the first login."""
+    get_pwd_context().handler("bcrypt").get_backend()
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
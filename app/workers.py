@@ -0,0 +1,47 @@
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Runs ``task`` every ``interval`` seconds on a daemon thread until stopped."""
+
+    def __init__(self, name: str, interval: float, task: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.task = task
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.task()
+            except Exception:
+                logger.exception("%s failed", self.name)
+
+
+_workers: List[PeriodicWorker] = []
+
+def start_worker(name: str, interval: float, task: Callable[[], object]) -> PeriodicWorker:
+    worker = PeriodicWorker(name, interval, task)
+    worker.start()
+    _workers.append(worker)
+    return worker
+
+def stop_workers():
+    while _workers:
+        _workers.pop().stop()
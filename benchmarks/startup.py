@@ -0,0 +1,91 @@
+"""Cold-start benchmark: import time of ``app.main`` and latency of the first requests.
+
+Every sample runs in a fresh interpreter, so nothing is shared between runs. The app runs
+in-process through its lifespan (startup hooks included) against a throwaway SQLite database
+unless ``--database-url`` is given. Times are medians over ``--runs`` samples.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --max-import-ms 1500 --max-first-request-ms 200   # exits 1 on regression
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample():
+    """One measurement; runs in the child process and prints JSON."""
+    started = time.perf_counter()
+    from app.main import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        ready = time.perf_counter()
+        # A database read, then the same request again for comparison
+        response = client.get("/demo/users")
+        first = time.perf_counter()
+        client.get("/demo/users")
+        second = time.perf_counter()
+    response.raise_for_status()
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "create_app_ms": (created - imported) * 1000,
+        "startup_ms": (ready - created) * 1000,
+        "first_request_ms": (first - ready) * 1000,
+        "second_request_ms": (second - first) * 1000,
+    }))
+
+
+def run(runs: int, database_url: str = None):
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(runs):
+            env = dict(os.environ, PYTHONPATH=ROOT)
+            env["DATABASE_URL"] = database_url or f"sqlite:///{directory}/startup{index}.db"
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--sample"],
+                cwd=ROOT, env=env, check=True, capture_output=True, text=True
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {name: statistics.median(sample[name] for sample in samples) for name in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and first-request latency of the API.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", help="default: a new SQLite file per run")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import time is above this")
+    parser.add_argument("--max-first-request-ms", type=float, help="fail if the median first request is above this")
+    parser.add_argument("--sample", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.sample:
+        sample()
+        return
+
+    result = run(args.runs, args.database_url)
+    for name, value in result.items():
+        print(f"{name:>20}: {value:8.1f} ms")
+
+    failures = []
+    if args.max_import_ms is not None and result["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {result['import_ms']:.1f} ms (limit {args.max_import_ms} ms)")
+    if args.max_first_request_ms is not None and result["first_request_ms"] > args.max_first_request_ms:
+        failures.append(f"first request took {result['first_request_ms']:.1f} ms (limit {args.max_first_request_ms} ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Generate a synthetic, production-shaped dataset for scale and query-plan testing.
+
+The data is deterministic for a given --seed and is produced in chunks of users. Each
+chunk is written in one transaction together with the progress row in
+``generate_estates_state``, so an interrupted run can be resumed with the same command.
+
+    python generate_estates.py --users 1000000 --seed 42
+    DATABASE_URL=sqlite:///./scale.db python generate_estates.py --users 100000
+    python generate_estates.py --users 5000000 --csv-dir /tmp/estates   # MariaDB LOAD DATA
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, text
+
+from app.config import settings
+from app.database import Base, init_db, is_sqlite, make_engine
+from app.models.user import User
+from app.models.asset import DigitalAsset, Beneficiary
+from app.models.event import DeathVerificationEvent, MultisigApproval, AssetTransfer
+
+# bcrypt hash of "password123", so every generated user can log in without hashing at load time
+PASSWORD_HASH = "$2b$12$FoziRGEKS6jqR8w3E.V1duE3xPwgqYkAYVww.I.4gj8smU5rWWXrm"
+
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Wei", "Aisha",
+               "Carlos", "Priya", "Olga", "Kenji", "Fatima", "Mateo", "Ingrid", "Kwame", "Sofia", "Arjun"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+              "Chen", "Okafor", "Novak", "Tanaka", "Haddad", "Silva", "Larsen", "Mensah", "Rossi", "Patel"]
+
+# Skewed toward wallets and documents, like real estates
+ASSET_TYPES = (["crypto_wallet"] * 3 + ["social_media"] * 2 + ["cloud_storage"] * 2 + ["documents"] * 4 + ["other"])
+VERIFICATION_TYPES = ["death_certificate"] * 6 + ["multiple_witnesses"] * 3 + ["legal_document"]
+# Final status of a deceased owner's verification
+EVENT_OUTCOMES = ["verified"] * 6 + ["pending"] * 3 + ["rejected", "requires_more_evidence"]
+
+EPOCH = datetime(2020, 1, 1)
+TABLES = [User.__table__, DigitalAsset.__table__, Beneficiary.__table__,
+          DeathVerificationEvent.__table__, MultisigApproval.__table__, AssetTransfer.__table__]
+# Rows are generated as tuples in this column order, already converted to driver-ready
+# values (JSON text, ISO timestamps, 0/1 booleans), so loading skips per-row bind processing
+COLUMNS = {
+    "users": ["id", "email", "hashed_password", "full_name", "date_of_birth", "is_verified",
+              "created_at", "updated_at"],
+    "digital_assets": ["id", "owner_id", "asset_type", "name", "description", "access_instructions",
+                       "metadata", "is_active", "created_at", "updated_at"],
+    "beneficiaries": ["id", "asset_id", "user_id", "share_percentage", "approval_required", "has_approved",
+                      "created_at"],
+    "death_verification_events": ["id", "user_id", "status", "verification_type", "evidence_data",
+                                  "required_approvals", "current_approvals", "initiated_by",
+                                  "created_at", "updated_at"],
+    "multisig_approvals": ["id", "event_id", "approver_id", "approval_status", "comments", "approved_at",
+                           "created_at"],
+    "asset_transfers": ["id", "asset_id", "from_user_id", "to_user_id", "transfer_date", "transfer_status",
+                        "death_event_id", "metadata", "created_at"],
+}
+
+
+# Resume point, written in the same transaction as each chunk's rows
+STATE = Table(
+    "generate_estates_state", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("params", Text, nullable=False),
+    Column("next_chunk", Integer, nullable=False),
+    Column("counters", Text, nullable=False),
+)
+
+
+def _timestamp(rng: random.Random, start_days: int = 0, span_days: int = 5 * 365) -> str:
+    return (EPOCH + timedelta(days=start_days, seconds=int(rng.random() * span_days * 86400))).isoformat(sep=" ")
+
+
+def _pick(rng: random.Random, choices: list):
+    # rng.choice() and rng.randint() go through _randbelow() and cost several times more
+    return choices[int(rng.random() * len(choices))]
+
+
+class EstateGenerator:
+    def __init__(self, seed: int, alpha: float, max_assets: int, deceased_rate: float):
+        self.seed = seed
+        self.alpha = alpha
+        self.max_assets = max_assets
+        self.deceased_rate = deceased_rate
+
+    def assets_for_owner(self, rng: random.Random) -> int:
+        # Power law: most owners hold a handful of assets, a long tail holds hundreds
+        return min(int(rng.paretovariate(self.alpha)) - 1, self.max_assets)
+
+    def chunk(self, index: int, first_user: int, last_user: int, counters: dict) -> dict:
+        """Generate all rows owned by users first_user..last_user. ``counters`` holds the next id per table."""
+        rng = random.Random(f"{self.seed}:{index}")
+        rows = {table.name: [] for table in TABLES}
+
+        for user_id in range(first_user, last_user + 1):
+            created = _timestamp(rng)
+            rows["users"].append((
+                user_id,
+                f"user{user_id}@example.com",
+                PASSWORD_HASH,
+                f"{_pick(rng, FIRST_NAMES)} {_pick(rng, LAST_NAMES)}",
+                (date(1930, 1, 1) + timedelta(days=int(rng.random() * 70 * 365))).isoformat(),
+                int(rng.random() < 0.7),
+                created,
+                created,
+            ))
+
+        for owner_id in range(first_user, last_user + 1):
+            owner_assets = []
+            for _ in range(self.assets_for_owner(rng)):
+                asset_id = counters["digital_assets"]
+                counters["digital_assets"] += 1
+                asset_type = _pick(rng, ASSET_TYPES)
+                created = _timestamp(rng)
+                rows["digital_assets"].append((
+                    asset_id,
+                    owner_id,
+                    asset_type,
+                    f"{asset_type.replace('_', ' ').title()} #{asset_id}",
+                    "Synthetic asset" if rng.random() < 0.5 else None,
+                    f'{{"vault_ref": "vault-{asset_id:x}", "encrypted": true}}',
+                    f'{{"estimated_value": {round(rng.lognormvariate(8, 2), 2)}}}',
+                    int(rng.random() < 0.95),
+                    created,
+                    created,
+                ))
+                beneficiaries = self._beneficiaries(rng, owner_id, last_user)
+                for user_id, share in beneficiaries:
+                    rows["beneficiaries"].append((
+                        counters["beneficiaries"], asset_id, user_id, share, int(rng.random() < 0.4), 0, created,
+                    ))
+                    counters["beneficiaries"] += 1
+                owner_assets.append((asset_id, asset_type, beneficiaries))
+
+            if owner_assets and rng.random() < self.deceased_rate:
+                self._death(rng, owner_id, owner_assets, rows, counters)
+        return rows
+
+    def _beneficiaries(self, rng, owner_id, last_user):
+        count = min(_pick(rng, [1, 1, 1, 2, 2, 3, 4]), last_user - 1)
+        # Heirs are mostly "family": users with nearby ids. Only already-loaded ids are
+        # eligible so foreign keys hold at every chunk boundary.
+        candidates = set()
+        while len(candidates) < count:
+            if rng.random() < 0.8:
+                candidate = owner_id - 50 + int(rng.random() * 101)
+            else:
+                candidate = 1 + int(rng.random() * last_user)
+            if 1 <= candidate <= last_user and candidate != owner_id:
+                candidates.add(candidate)
+        heirs = sorted(candidates)
+        if not heirs:
+            return []
+        shares = [round(100.0 / len(heirs), 2)] * len(heirs)
+        shares[0] = round(100.0 - sum(shares[1:]), 2)
+        return list(zip(heirs, shares))
+
+    def _death(self, rng, owner_id, owner_assets, rows, counters):
+        event_id = counters["death_verification_events"]
+        counters["death_verification_events"] += 1
+        heirs = sorted({user_id for _, _, beneficiaries in owner_assets for user_id, _ in beneficiaries})
+        status = _pick(rng, EVENT_OUTCOMES)
+        required = min(_pick(rng, [1, 2, 2, 3]), max(len(heirs), 1))
+        approvals = required if status == "verified" else int(rng.random() * required)
+        approvers = heirs[:approvals]
+        created = _timestamp(rng, start_days=5 * 365, span_days=365)
+        rows["death_verification_events"].append((
+            event_id,
+            owner_id,
+            status,
+            _pick(rng, VERIFICATION_TYPES),
+            f'{{"certificate_number": "DC-{event_id:08d}"}}',
+            required,
+            len(approvers),
+            heirs[0] if heirs else owner_id,
+            created,
+            created,
+        ))
+        for approver_id in approvers:
+            rows["multisig_approvals"].append((
+                counters["multisig_approvals"], event_id, approver_id, "approved", None, created, created,
+            ))
+            counters["multisig_approvals"] += 1
+        if status != "verified":
+            return
+        for asset_id, asset_type, beneficiaries in owner_assets:
+            for user_id, share in beneficiaries:
+                rows["asset_transfers"].append((
+                    counters["asset_transfers"],
+                    asset_id,
+                    owner_id,
+                    user_id,
+                    created,
+                    _pick(rng, ["completed", "completed", "pending", "failed"]),
+                    event_id,
+                    json.dumps({"share_percentage": share, "asset_type": asset_type}),
+                    created,
+                ))
+                counters["asset_transfers"] += 1
+
+
+def load_rows(connection, rows: dict):
+    """Multi-row INSERTs straight through the DBAPI's executemany, parents before children."""
+    placeholder = "?" if connection.dialect.paramstyle == "qmark" else "%s"
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        for table in TABLES:
+            if not rows[table.name]:
+                continue
+            columns = COLUMNS[table.name]
+            cursor.executemany(
+                f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})",
+                rows[table.name],
+            )
+    finally:
+        cursor.close()
+
+
+def load_csv(connection, rows: dict, csv_dir: str, chunk: int):
+    """Write each table to CSV and bulk load it with LOAD DATA LOCAL INFILE (MariaDB only)."""
+    for table in TABLES:
+        if not rows[table.name]:
+            continue
+        path = os.path.join(csv_dir, f"{table.name}.{chunk}.csv")
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            for row in rows[table.name]:
+                writer.writerow(["\\N" if value is None else value for value in row])
+        connection.execute(text(
+            f"LOAD DATA LOCAL INFILE :path INTO TABLE {table.name} "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\r\\n' "
+            f"({', '.join(COLUMNS[table.name])})"
+        ), {"path": path})
+        os.remove(path)
+
+
+def load_state(connection, params: dict) -> dict:
+    row = connection.execute(STATE.select()).first()
+    if row is None:
+        return {"params": params, "next_chunk": 0, "counters": {table.name: 1 for table in TABLES[1:]}}
+    state = {"params": json.loads(row.params), "next_chunk": row.next_chunk, "counters": json.loads(row.counters)}
+    if state["params"] != params:
+        sys.exit(f"The database was loaded with different parameters {state['params']}; use --reset to start over")
+    return state
+
+
+def save_state(connection, state: dict):
+    connection.execute(STATE.delete())
+    connection.execute(STATE.insert(), {
+        "id": 1, "params": json.dumps(state["params"]), "next_chunk": state["next_chunk"],
+        "counters": json.dumps(state["counters"]),
+    })
+
+
+def secondary_indexes() -> list:
+    return [index for table in TABLES for index in table.indexes]
+
+
+def generate(engine, params: dict, csv_dir: str = None):
+    """Load every chunk not yet recorded in ``generate_estates_state``."""
+    STATE.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        state = load_state(connection, params)
+    generator = EstateGenerator(params["seed"], params["alpha"], params["max_assets"], params["deceased_rate"])
+    chunk_size = params["chunk_size"]
+    chunks = (params["users"] + chunk_size - 1) // chunk_size
+    started, loaded = time.time(), 0
+    if state["next_chunk"] >= chunks:
+        print("Dataset already complete.")
+
+    # On SQLite, updating the secondary indexes row by row costs more than the inserts
+    # themselves: drop them for the load and build each one once at the end
+    sqlite = engine.dialect.name == "sqlite"
+    if sqlite and state["next_chunk"] < chunks:
+        with engine.begin() as connection:
+            for index in secondary_indexes():
+                index.drop(connection, checkfirst=True)
+
+    def make_chunk(index, counters):
+        first_user = index * chunk_size + 1
+        last_user = min(first_user + chunk_size - 1, params["users"])
+        counters = dict(counters)
+        return index, first_user, last_user, generator.chunk(index, first_user, last_user, counters), counters
+
+    # Generate the next chunk while the current one is being loaded
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = None
+        if state["next_chunk"] < chunks:
+            pending = pool.submit(make_chunk, state["next_chunk"], state["counters"])
+        while pending is not None:
+            index, first_user, last_user, rows, counters = pending.result()
+            pending = pool.submit(make_chunk, index + 1, counters) if index + 1 < chunks else None
+            state["next_chunk"] = index + 1
+            state["counters"] = counters
+            # The progress row commits with the chunk, so a resumed run never loads a chunk twice
+            with engine.begin() as connection:
+                if csv_dir:
+                    load_csv(connection, rows, csv_dir, index)
+                else:
+                    load_rows(connection, rows)
+                save_state(connection, state)
+
+            loaded += sum(len(table_rows) for table_rows in rows.values())
+            elapsed = time.time() - started
+            print(f"chunk {index + 1}/{chunks}: users {first_user}-{last_user}, "
+                  f"{loaded} rows in {elapsed:.1f}s ({loaded / elapsed:,.0f} rows/s)")
+
+    if sqlite:
+        with engine.begin() as connection:
+            for index in secondary_indexes():
+                index.create(connection, checkfirst=True)
+    if loaded:
+        elapsed = time.time() - started
+        print(f"{loaded} rows in {elapsed:.1f}s including indexes ({loaded / elapsed:,.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and bulk load a synthetic Digital Legacy Vault dataset.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="users per transaction")
+    parser.add_argument("--alpha", type=float, default=1.6, help="Pareto shape of assets per owner")
+    parser.add_argument("--max-assets", type=int, default=500)
+    parser.add_argument("--deceased-rate", type=float, default=0.02)
+    parser.add_argument("--csv-dir", help="load through CSV files and LOAD DATA LOCAL INFILE (MariaDB)")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables, then start over")
+    args = parser.parse_args()
+
+    params = {"users": args.users, "seed": args.seed, "chunk_size": args.chunk_size, "alpha": args.alpha,
+              "max_assets": args.max_assets, "deceased_rate": args.deceased_rate}
+    engine_options = {"connect_args": {"local_infile": True}} if args.csv_dir else {}
+    engine = make_engine(args.database_url, **engine_options)
+
+    if args.reset:
+        Base.metadata.drop_all(engine)
+        STATE.drop(engine, checkfirst=True)
+    if args.reset or is_sqlite(args.database_url):
+        init_db(engine)
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+
+    generate(engine, params, args.csv_dir)
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
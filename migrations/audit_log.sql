@@ -0,0 +1,49 @@
+-- Adds the audit log tables to databases created before they were part of init.sql.
+USE legacy_vault;
+
+-- Append-only, Merkle-sealed log of approvals and transfers (see app/crud/audit.py)
+CREATE TABLE IF NOT EXISTS audit_batches (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    merkle_root CHAR(64) NOT NULL,
+    prev_hash CHAR(64) NOT NULL,
+    batch_hash CHAR(64) NOT NULL,
+    entry_count INT NOT NULL,
+    first_entry_id INT NOT NULL,
+    last_entry_id INT NOT NULL,
+    sealed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_audit_prev_hash (prev_hash)
+);
+
+CREATE TABLE IF NOT EXISTS audit_log_entries (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    entity_type ENUM('multisig_approval', 'asset_transfer') NOT NULL,
+    entity_id INT NOT NULL,
+    owner_id INT NOT NULL,
+    leaf_hash CHAR(64) NOT NULL,
+    batch_id INT NULL,
+    leaf_index INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (batch_id) REFERENCES audit_batches(id),
+    UNIQUE KEY unique_audit_entity (entity_type, entity_id),
+    KEY idx_audit_entries_batch (batch_id, leaf_index)
+);
+
+-- Databases that created audit_batches before the constraint existed
+ALTER TABLE audit_batches ADD UNIQUE KEY IF NOT EXISTS unique_audit_prev_hash (prev_hash);
+
+-- Chain head, one row; sealers lock it so concurrent seals extend the chain one at a time
+CREATE TABLE IF NOT EXISTS audit_chain_state (
+    id INT PRIMARY KEY,
+    head_batch_id INT NULL,
+    head_hash CHAR(64) NOT NULL,
+    -- How far the log has been verified (see verify_log)
+    verified_batch_id INT NULL,
+    verified_hash CHAR(64) NULL
+);
+-- Tables created before verification progress was stored
+ALTER TABLE audit_chain_state ADD COLUMN IF NOT EXISTS verified_batch_id INT NULL;
+ALTER TABLE audit_chain_state ADD COLUMN IF NOT EXISTS verified_hash CHAR(64) NULL;
+INSERT IGNORE INTO audit_chain_state (id, head_batch_id, head_hash)
+SELECT 1, NULL, REPEAT('0', 64) FROM DUAL WHERE NOT EXISTS (SELECT 1 FROM audit_batches);
+INSERT IGNORE INTO audit_chain_state (id, head_batch_id, head_hash)
+SELECT 1, id, batch_hash FROM audit_batches ORDER BY id DESC LIMIT 1;
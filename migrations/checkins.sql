@@ -0,0 +1,11 @@
+-- Adds dead man's switch check-ins to databases created before they were part of init.sql.
+USE legacy_vault;
+
+ALTER TABLE users
+    ADD COLUMN checkin_interval INT NULL AFTER is_verified,
+    ADD COLUMN last_checkin_at TIMESTAMP NULL WITHOUT SYSTEM VERSIONING AFTER checkin_interval,
+    ADD COLUMN next_due_at TIMESTAMP NULL WITHOUT SYSTEM VERSIONING AFTER last_checkin_at,
+    ADD INDEX idx_users_next_due (next_due_at);
+
+ALTER TABLE death_verification_events
+    MODIFY verification_type ENUM('death_certificate', 'multiple_witnesses', 'legal_document', 'missed_checkin') NOT NULL;
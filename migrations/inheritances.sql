@@ -0,0 +1,4 @@
+-- Reverse index for GET /users/me/inheritances on databases created before it was part of init.sql.
+USE legacy_vault;
+
+CREATE INDEX idx_beneficiaries_user ON beneficiaries(user_id, asset_id, share_percentage, approval_required);
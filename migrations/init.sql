@@ -9,6 +9,10 @@ CREATE TABLE users (
     full_name VARCHAR(255) NOT NULL,
     date_of_birth DATE,
     is_verified BOOLEAN DEFAULT FALSE,
+    -- Dead man's switch; check-ins only touch unversioned columns, so they add no history rows
+    checkin_interval INT NULL,
+    last_checkin_at TIMESTAMP NULL WITHOUT SYSTEM VERSIONING,
+    next_due_at TIMESTAMP NULL WITHOUT SYSTEM VERSIONING,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 ) WITH SYSTEM VERSIONING;
@@ -47,7 +51,7 @@ CREATE TABLE death_verification_events (
     id INT PRIMARY KEY AUTO_INCREMENT,
     user_id INT NOT NULL,
     status ENUM('pending', 'verified', 'rejected', 'requires_more_evidence') NOT NULL,
-    verification_type ENUM('death_certificate', 'multiple_witnesses', 'legal_document') NOT NULL,
+    verification_type ENUM('death_certificate', 'multiple_witnesses', 'legal_document', 'missed_checkin') NOT NULL,
     evidence_data JSON,
     required_approvals INT DEFAULT 1,
     current_approvals INT DEFAULT 0,
@@ -89,9 +93,49 @@ CREATE TABLE asset_transfers (
     FOREIGN KEY (death_event_id) REFERENCES death_verification_events(id)
 ) WITH SYSTEM VERSIONING;
 
+-- Append-only, Merkle-sealed log of approvals and transfers (see app/crud/audit.py)
+CREATE TABLE audit_batches (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    merkle_root CHAR(64) NOT NULL,
+    prev_hash CHAR(64) NOT NULL,
+    batch_hash CHAR(64) NOT NULL,
+    entry_count INT NOT NULL,
+    first_entry_id INT NOT NULL,
+    last_entry_id INT NOT NULL,
+    sealed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_audit_prev_hash (prev_hash)
+);
+
+CREATE TABLE audit_log_entries (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    entity_type ENUM('multisig_approval', 'asset_transfer') NOT NULL,
+    entity_id INT NOT NULL,
+    owner_id INT NOT NULL,
+    leaf_hash CHAR(64) NOT NULL,
+    batch_id INT NULL,
+    leaf_index INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (batch_id) REFERENCES audit_batches(id),
+    UNIQUE KEY unique_audit_entity (entity_type, entity_id),
+    KEY idx_audit_entries_batch (batch_id, leaf_index)
+);
+
+-- Chain head, one row; sealers lock it so concurrent seals extend the chain one at a time
+CREATE TABLE audit_chain_state (
+    id INT PRIMARY KEY,
+    head_batch_id INT NULL,
+    head_hash CHAR(64) NOT NULL,
+    -- How far the log has been verified (see verify_log)
+    verified_batch_id INT NULL,
+    verified_hash CHAR(64) NULL
+);
+INSERT INTO audit_chain_state (id, head_batch_id, head_hash) VALUES (1, NULL, REPEAT('0', 64));
+
 -- Create indexes for performance
 CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX idx_users_next_due ON users(next_due_at);
 CREATE INDEX idx_assets_owner ON digital_assets(owner_id);
 CREATE INDEX idx_beneficiaries_asset ON beneficiaries(asset_id);
+CREATE INDEX idx_beneficiaries_user ON beneficiaries(user_id, asset_id, share_percentage, approval_required);
 CREATE INDEX idx_death_events_user ON death_verification_events(user_id);
 CREATE INDEX idx_transfers_asset ON asset_transfers(asset_id);
\ No newline at end of file
@@ -0,0 +1,9 @@
+-- Run on every shard when SHARD_URLS is configured (see app/sharding.py).
+-- Rows are placed on their owner's shard, so these references can point at users
+-- stored on another shard and cannot be enforced by the database.
+USE legacy_vault;
+
+ALTER TABLE beneficiaries DROP FOREIGN KEY beneficiaries_ibfk_2;                         -- user_id
+ALTER TABLE death_verification_events DROP FOREIGN KEY death_verification_events_ibfk_2; -- initiated_by
+ALTER TABLE multisig_approvals DROP FOREIGN KEY multisig_approvals_ibfk_2;               -- approver_id
+ALTER TABLE asset_transfers DROP FOREIGN KEY asset_transfers_ibfk_3;                     -- to_user_id
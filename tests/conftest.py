@@ -0,0 +1,119 @@
+"""Shared fixtures.
+
+Each test runs against an in-memory SQLite database inside ``rollback_session()``: the
+schema is created once per worker process and every test's writes, commits included, are
+rolled back when it ends. Run the suite in parallel with ``pytest -n auto`` (the default,
+see pytest.ini); each xdist worker gets its own in-memory database.
+"""
+import os
+import threading
+
+# Must be set before app.config is imported
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["SHARD_URLS"] = ""
+os.environ["CACHE_SHARED_BACKEND"] = ""
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from app import database
+from app.cache import set_cache
+from app.database import get_db, init_db, rollback_session
+from app.main import create_app
+from app.throttle import set_throttle
+from app.utils import security
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    init_db()
+    # Full-strength bcrypt costs ~250ms per hash; tests don't need it
+    security._pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    yield
+    database.dispose_engines()
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons():
+    # Throttle counters and cached rows must not leak between tests
+    set_throttle(None)
+    set_cache(None)
+    yield
+    set_throttle(None)
+    set_cache(None)
+
+
+@pytest.fixture
+def db():
+    with rollback_session() as session:
+        yield session
+
+
+@pytest.fixture
+def app(db):
+    # No lifespan: the schema already exists and background workers aren't wanted in tests
+    application = create_app()
+    turn = threading.Lock()
+
+    def test_db(request: Request):
+        if getattr(request.state, "user", None) is None or getattr(request.state, "db", None) is not None:
+            # Top-level requests, and batch writes or lone reads handed the batch's session
+            yield db
+            return
+        # A run of batch GETs: in production each gets its own session and they run
+        # concurrently, but here there is only the test's Session, which must not be
+        # used from several threads at once, so they take turns
+        with turn:
+            yield db
+
+    application.dependency_overrides[get_db] = test_db
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user(client):
+    """Register and log in a user; returns ``(auth headers, user id)``."""
+    counter = iter(range(1, 10000))
+
+    def make(email=None, password="secret"):
+        email = email or f"user{next(counter)}@example.com"
+        response = client.post("/auth/register", json={"email": email, "password": password, "full_name": email})
+        assert response.status_code == 200, response.text
+        token = client.post("/auth/login", json={"email": email, "password": password}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}, response.json()["id"]
+
+    return make
+
+
+@pytest.fixture
+def estate(client, make_user):
+    """An owner with ``count`` assets, each left 100% to one beneficiary."""
+
+    def build(count=2, owner=None, beneficiary=None):
+        owner_headers, owner_id = owner or make_user()
+        beneficiary_headers, beneficiary_id = beneficiary or make_user()
+        assets = []
+        for index in range(count):
+            asset = client.post(
+                "/assets", json={"name": f"asset {index}", "asset_type": "documents"}, headers=owner_headers
+            ).json()
+            client.post(
+                f"/assets/{asset['id']}/beneficiaries",
+                json={"user_id": beneficiary_id, "share_percentage": 100},
+                headers=owner_headers,
+            )
+            assets.append(asset)
+        return {
+            "owner": (owner_headers, owner_id),
+            "beneficiary": (beneficiary_headers, beneficiary_id),
+            "assets": assets,
+        }
+
+    return build
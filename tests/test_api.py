@@ -0,0 +1,96 @@
+from fastapi.testclient import TestClient
+
+from app import database
+from app.config import Settings, settings
+from app.database import init_db
+from app.main import create_app
+
+
+def test_register_login_and_me(client, make_user):
+    headers, user_id = make_user("me@example.com")
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == user_id
+
+
+def test_wrong_password_is_rejected(client, make_user):
+    make_user("wrong@example.com")
+    response = client.post("/auth/login", json={"email": "wrong@example.com", "password": "nope"})
+    assert response.status_code == 401
+
+
+def test_sparse_fieldsets(client, estate):
+    headers, _ = estate(count=2)["owner"]
+    response = client.get("/assets?fields=id,name", headers=headers)
+    assert response.status_code == 200
+    assert all(set(asset) == {"id", "name"} for asset in response.json())
+    assert client.get("/assets?fields=id,nope", headers=headers).status_code == 400
+
+
+def test_sparse_and_full_responses_serialize_alike(client, make_user):
+    headers, _ = make_user()
+    asset_id = client.post("/assets", headers=headers, json={
+        "name": "a", "asset_type": "documents", "metadata": {"note": "x"}
+    }).json()["id"]
+    full = client.get(f"/assets/{asset_id}", headers=headers).json()
+    assert full["metadata"] == {"note": "x"}
+    sparse = client.get(f"/assets/{asset_id}?fields=asset_type,metadata,created_at,beneficiaries", headers=headers)
+    assert sparse.json() == {name: full[name] for name in ("id", "asset_type", "metadata", "created_at", "beneficiaries")}
+
+
+def test_batch_runs_sub_requests_in_order(client, make_user):
+    headers, user_id = make_user()
+    response = client.post("/batch", headers=headers, json={"requests": [
+        {"id": "create", "method": "POST", "path": "/assets", "body": {"name": "a", "asset_type": "documents"}},
+        {"id": "list", "method": "GET", "path": "/assets"},
+        {"id": "missing", "method": "GET", "path": "/assets/999999"},
+    ]})
+    assert response.status_code == 200
+    results = {item["id"]: item for item in response.json()}
+    assert results["create"]["status"] == 200
+    assert [asset["name"] for asset in results["list"]["body"]] == ["a"]
+    assert results["missing"]["status"] == 404
+
+
+def test_verification_stream_of_finished_event_sends_snapshot(client, estate):
+    parties = estate(count=1)
+    headers, owner_id = parties["owner"]
+    event = client.post("/death-verifications", headers=headers, json={
+        "user_id": owner_id, "verification_type": "death_certificate", "evidence_data": {}
+    }).json()
+    client.post(f"/death-verifications/{event['id']}/approvals", headers=parties["beneficiary"][0],
+                json={"approval_status": "approved"})
+    with client.stream("GET", f"/death-verifications/{event['id']}/events") as response:
+        body = "".join(response.iter_text())
+    assert "event: verification" in body
+    assert '"status": "verified"' in body
+
+
+def test_inheritances_are_paged(client, estate, make_user):
+    beneficiary = make_user()
+    for _ in range(3):
+        estate(count=2, beneficiary=beneficiary)
+    headers, _ = beneficiary
+    first = client.get("/users/me/inheritances?limit=4", headers=headers).json()
+    assert len(first["items"]) == 4 and first["next_after"] is not None
+    rest = client.get(f"/users/me/inheritances?limit=4&after={first['next_after']}", headers=headers).json()
+    assert len(rest["items"]) == 2 and rest["next_after"] is None
+
+
+def test_create_app_applies_settings_overrides():
+    original = settings.DB_POOL_WARMUP
+    try:
+        create_app(Settings(DB_POOL_WARMUP=2))
+        assert settings.DB_POOL_WARMUP == 2
+    finally:
+        settings.DB_POOL_WARMUP = original
+        # Overrides drop the engine, and with it this worker's in-memory database
+        init_db()
+
+
+def test_lifespan_warms_the_pool_and_disposes_it():
+    with TestClient(create_app()) as client:
+        assert database._engine is not None
+        assert client.get("/").status_code == 200
+    assert database._engine is None
+    init_db()
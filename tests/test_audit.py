@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.crud import audit as audit_crud
+from app.crud import event as event_crud
+from app.models.audit import AuditBatch, AuditChainState, AuditLogEntry
+from app.models.event import MultisigApproval
+from app.schemas.event import MultisigApprovalCreate
+from app.utils import merkle
+
+
+@pytest.fixture
+def verification(client, estate):
+    parties = estate(count=1)
+    headers, owner_id = parties["owner"]
+    event = client.post("/death-verifications", headers=headers, json={
+        "user_id": owner_id, "verification_type": "death_certificate", "evidence_data": {}, "required_approvals": 2
+    }).json()
+    return event, parties
+
+
+def test_approval_and_its_audit_entry_commit_together(db, verification, monkeypatch):
+    event, parties = verification
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("audit write failed")
+
+    monkeypatch.setattr(audit_crud, "record_approval", fail)
+    with pytest.raises(RuntimeError):
+        event_crud.add_approval(db, event["id"], MultisigApprovalCreate(approval_status="approved"),
+                                approver_id=parties["beneficiary"][1])
+    db.rollback()
+    assert db.query(MultisigApproval).filter(MultisigApproval.event_id == event["id"]).count() == 0
+
+
+def test_seals_chain_through_the_state_row(client, db, verification, make_user):
+    event, parties = verification
+    for approver in (parties["beneficiary"], make_user()):
+        client.post(f"/death-verifications/{event['id']}/approvals", headers=approver[0],
+                    json={"approval_status": "approved"})
+        assert audit_crud.seal_pending(db) >= 1
+
+    batches = db.query(AuditBatch).order_by(AuditBatch.id).all()
+    state = db.get(AuditChainState, 1)
+    assert (state.head_batch_id, state.head_hash) == (batches[-1].id, batches[-1].batch_hash)
+    assert batches[1].prev_hash == batches[0].batch_hash
+    assert db.query(AuditLogEntry).filter(AuditLogEntry.batch_id.is_(None)).count() == 0
+    assert audit_crud.verify_log(db, full=True)["valid"]
+
+
+def test_verification_progress_is_stored_with_the_chain(client, db, verification, make_user, monkeypatch):
+    event, parties = verification
+    client.post(f"/death-verifications/{event['id']}/approvals", headers=parties["beneficiary"][0],
+                json={"approval_status": "approved"})
+    audit_crud.seal_pending(db)
+    headers, _ = make_user("operator@example.com")
+
+    assert client.get("/audit/verify", headers=headers).json()["batches_verified"] == 1
+    batch = db.query(AuditBatch).one()
+    state = db.get(AuditChainState, 1)
+    db.refresh(state)
+    assert (state.verified_batch_id, state.verified_hash) == (batch.id, batch.batch_hash)
+    assert client.get("/audit/verify", headers=headers).json()["batches_verified"] == 0
+
+    assert client.get("/audit/verify?full=true", headers=headers).status_code == 403
+    monkeypatch.setattr(settings, "OPERATOR_EMAILS", ["operator@example.com"])
+    assert client.get("/audit/verify?full=true", headers=headers).json()["batches_verified"] == 1
+
+
+def test_two_batches_cannot_chain_onto_the_same_predecessor(db):
+    def batch(first_entry_id):
+        root = merkle.merkle_root([merkle.leaf_hash({"id": first_entry_id})])
+        return AuditBatch(
+            merkle_root=root, prev_hash=merkle.GENESIS_HASH, batch_hash=merkle.chain_hash(merkle.GENESIS_HASH, root, 1),
+            entry_count=1, first_entry_id=first_entry_id, last_entry_id=first_entry_id,
+        )
+
+    db.add_all([batch(1), batch(2)])
+    with pytest.raises(IntegrityError):
+        db.flush()
+    db.rollback()
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+from app.cache import FileSharedCache, ReadThroughCache, set_cache
+from app.crud import user as user_crud
+from app.models.user import User
+
+
+def test_password_hashes_stay_out_of_cached_users(db, make_user, tmp_path):
+    _, user_id = make_user()
+    hashed_password = user_crud.get_user(db, user_id).hashed_password
+    set_cache(ReadThroughCache(shared=FileSharedCache(str(tmp_path))))
+    db.expunge_all()
+    user_crud.get_user(db, user_id)
+
+    stored = [(tmp_path / name).read_bytes() for name in os.listdir(tmp_path)]
+    assert stored and not any(hashed_password.encode() in data for data in stored)
+
+    # Another process: served from the shared tier, the hash loads from the database on access
+    other = ReadThroughCache(shared=FileSharedCache(str(tmp_path)))
+    set_cache(other)
+    db.expunge_all()
+    user = user_crud.get_user(db, user_id)
+    assert other.hits == 1
+    assert user.hashed_password == hashed_password
+
+
+def test_expired_entries_are_deleted_on_read(tmp_path):
+    shared = FileSharedCache(str(tmp_path))
+    shared.set("v2:g0:user:1:0", b"row", ttl=-1)
+    assert shared.get("v2:g0:user:1:0") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_sweep_removes_expired_entries_and_stale_temp_files(tmp_path):
+    shared = FileSharedCache(str(tmp_path), sweep_interval=60)
+    shared.set("live", b"a", ttl=300)
+    shared.set("expired", b"b", ttl=-1)
+    shared.incr("user:1")
+    stale = tmp_path / ".tmpcrashed"
+    stale.write_bytes(b"partial")
+    os.utime(stale, (time.time() - 120, time.time() - 120))
+
+    assert shared.sweep() == 2
+    assert sorted(os.listdir(tmp_path)) == ["counter_user_1", "live"]
+    assert shared.get("live") == b"a"
+    assert shared.version("user:1") == 1
+
+
+def test_set_sweeps_once_the_interval_has_passed(tmp_path):
+    shared = FileSharedCache(str(tmp_path), sweep_interval=0)
+    shared.set("expired", b"b", ttl=-1)
+    shared.set("live", b"a", ttl=300)
+    assert os.listdir(tmp_path) == ["live"]
+
+
+def test_waiter_loads_itself_when_the_result_cannot_be_cached(db, make_user):
+    _, user_id = make_user()
+    user = db.get(User, user_id)
+    user.full_name = "unflushed"  # modified instances aren't cached
+    cache = ReadThroughCache()
+    results = {}
+
+    def follower():
+        results["follower"] = cache.get(db, "user", user_id, lambda: user)
+
+    def lead():
+        thread = threading.Thread(target=follower)
+        thread.start()
+        # The follower counts its miss before it finds the flight and waits on it
+        while cache.misses < 2:
+            time.sleep(0.001)
+        results["thread"] = thread
+        return user
+
+    assert cache.get(db, "user", user_id, lead) is user
+    results["thread"].join()
+    assert results["follower"] is user
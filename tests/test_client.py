@@ -0,0 +1,89 @@
+"""vault_client against the app in-process, plus its retry rules."""
+import asyncio
+
+import httpx
+import pytest
+
+from vault_client import AsyncVaultClient, VaultClient, _base
+from vault_client import client as sync_client
+from vault_client._base import Call
+
+
+class InProcessTransport(httpx.BaseTransport):
+    """Sync transport that hands requests to the app through a Starlette TestClient."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def handle_request(self, request):
+        response = self.client.request(
+            request.method, str(request.url), headers=dict(request.headers), content=request.read()
+        )
+        return httpx.Response(response.status_code, headers=response.headers, content=response.content)
+
+
+@pytest.fixture
+def vault(client, make_user):
+    make_user("client@example.com")
+    with VaultClient(
+        "http://testserver", transport=InProcessTransport(client),
+        email="client@example.com", password="secret"
+    ) as vault:
+        yield vault
+
+
+def test_logs_in_and_pages_assets(vault):
+    created = vault.create_assets([{"name": f"asset {index}", "asset_type": "documents"} for index in range(5)])
+    assert [asset.name for asset in created] == [f"asset {index}" for index in range(5)]
+
+    assert [asset.id for asset in vault.iter_assets(page_size=2)] == [asset.id for asset in created]
+    assert vault.me().email == "client@example.com"
+
+
+def test_logs_in_again_after_a_rejected_token(vault):
+    vault.me()
+    vault._token = "revoked"
+    assert vault.me().email == "client@example.com"
+    assert vault._token != "revoked"
+
+
+def test_async_client_over_asgi_transport(app, make_user):
+    make_user("async@example.com")
+
+    async def run():
+        async with AsyncVaultClient(
+            "http://testserver", transport=httpx.ASGITransport(app=app),
+            email="async@example.com", password="secret"
+        ) as vault:
+            asset = await vault.create_asset({"name": "deed", "asset_type": "documents"})
+            return asset, [item.id async for item in vault.iter_assets(page_size=1)]
+
+    asset, listed = asyncio.run(run())
+    assert listed == [asset.id]
+
+
+def test_retry_after_is_capped():
+    response = httpx.Response(429, headers={"retry-after": "300"})
+    assert _base.backoff_delay(0, response) == 8.0
+    assert _base.backoff_delay(0, httpx.Response(429, headers={"retry-after": "2"})) == 2.0
+
+
+def test_only_unsent_requests_are_retried_for_non_get_calls():
+    assert _base.can_retry(Call("GET", "/assets"), httpx.ReadTimeout("slow"))
+    assert _base.can_retry(Call("POST", "/assets"), httpx.ConnectError("refused"))
+    assert not _base.can_retry(Call("POST", "/assets"), httpx.ReadTimeout("slow"))
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 3), ("POST", 1)])
+def test_read_timeouts_replay_only_gets(monkeypatch, method, attempts):
+    monkeypatch.setattr(sync_client.time, "sleep", lambda seconds: None)
+    seen = []
+
+    def handler(request):
+        seen.append(request.method)
+        raise httpx.ReadTimeout("slow", request=request)
+
+    with VaultClient("http://testserver", transport=httpx.MockTransport(handler), max_retries=2) as vault:
+        with pytest.raises(httpx.ReadTimeout):
+            vault._request(Call(method, "/assets"))
+    assert seen == [method] * attempts
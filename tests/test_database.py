@@ -0,0 +1,29 @@
+from sqlalchemy import inspect, text
+
+from app import database
+from app.crud import user as user_crud
+from app.database import is_sqlite, rollback_session
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+
+def test_schema_is_created_from_models():
+    tables = set(inspect(database.get_engine()).get_table_names())
+    assert {"users", "digital_assets", "beneficiaries", "death_verification_events", "audit_batches"} <= tables
+
+
+def test_foreign_keys_are_enforced(db):
+    assert db.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+def test_commits_inside_rollback_session_are_undone():
+    with rollback_session() as db:
+        user_crud.create_user(db, UserCreate(email="kept@example.com", password="pw", full_name="Kept"))
+        assert db.query(User).filter(User.email == "kept@example.com").count() == 1
+    with rollback_session() as db:
+        assert db.query(User).filter(User.email == "kept@example.com").count() == 0
+
+
+def test_is_sqlite():
+    assert is_sqlite("sqlite:///./x.db")
+    assert not is_sqlite("mariadb+pymysql://user:pw@localhost/db")
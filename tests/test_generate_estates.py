@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import inspect, text
+
+import generate_estates
+from app.database import init_db, make_engine
+
+PARAMS = {"users": 300, "seed": 7, "chunk_size": 100, "alpha": 1.6, "max_assets": 20, "deceased_rate": 0.2}
+
+
+def load(path, params=PARAMS):
+    engine = make_engine(f"sqlite:///{path}")
+    init_db(engine)
+    generate_estates.generate(engine, params)
+    return engine
+
+
+def counts(engine):
+    with engine.connect() as connection:
+        return {
+            table.name: connection.execute(text(f"SELECT COUNT(*), MAX(id) FROM {table.name}")).one()
+            for table in generate_estates.TABLES
+        }
+
+
+def test_resume_after_a_crash_mid_chunk_loads_each_chunk_once(tmp_path, monkeypatch):
+    expected = counts(load(tmp_path / "clean.db"))
+
+    real_load_rows, calls = generate_estates.load_rows, []
+
+    def crash_on_second_chunk(connection, rows):
+        calls.append(1)
+        real_load_rows(connection, rows)
+        if len(calls) == 2:
+            raise RuntimeError("killed")
+
+    monkeypatch.setattr(generate_estates, "load_rows", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        load(tmp_path / "resumed.db")
+    monkeypatch.setattr(generate_estates, "load_rows", real_load_rows)
+
+    engine = load(tmp_path / "resumed.db")
+    assert counts(engine) == expected
+    # Secondary indexes are dropped for the load and rebuilt at the end
+    assert {index["name"] for index in inspect(engine).get_indexes("digital_assets")} >= {"idx_assets_owner"}
+
+
+def test_refuses_to_resume_with_different_parameters(tmp_path):
+    load(tmp_path / "estates.db")
+    with pytest.raises(SystemExit):
+        load(tmp_path / "estates.db", dict(PARAMS, seed=8))
@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import inspect, select
+
+from app import sharding
+from app.config import settings
+from app.database import Base
+from app.models.asset import DigitalAsset
+from app.models.user import User
+from app.sharding import OwnerMoving, ShardRouter, move_owner
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = ShardRouter(
+        [f"sqlite:///{tmp_path}/shard0.db", f"sqlite:///{tmp_path}/shard1.db"], str(tmp_path / "shard_map.json")
+    )
+    for engine in router.engines.values():
+        Base.metadata.create_all(engine)
+    yield router
+    for engine in router.engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def owner(router):
+    with router.sessionmaker() as session:
+        user = User(email="owner@example.com", hashed_password="x", full_name="Owner")
+        session.add(user)
+        session.commit()
+        session.add_all([
+            DigitalAsset(owner_id=user.id, asset_type="documents", name=f"asset {index}") for index in range(3)
+        ])
+        session.commit()
+        return user.id, inspect(user).identity_token
+
+
+def names(engine, owner_id):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(DigitalAsset.__table__.c.name)
+            .where(DigitalAsset.__table__.c.owner_id == owner_id)
+            .order_by(DigitalAsset.__table__.c.id)
+        ).scalars().all()
+
+
+def test_move_syncs_late_writes_and_purges_only_after_the_switch_propagates(router, owner, monkeypatch):
+    owner_id, source = owner
+    target = "1" if source == "0" else "0"
+    table = DigitalAsset.__table__
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        if len(waits) == 1:
+            # Frozen: ORM writes are refused ...
+            assert router.shard_map.is_frozen(owner_id)
+            with router.sessionmaker() as session:
+                asset = session.scalars(select(DigitalAsset).where(DigitalAsset.owner_id == owner_id)).first()
+                asset.name = "refused"
+                with pytest.raises(OwnerMoving):
+                    session.commit()
+            # ... but a transaction that passed the check before the freeze can still land
+            with router.engines[source].begin() as connection:
+                first, second, third = connection.execute(
+                    select(table.c.id).where(table.c.owner_id == owner_id).order_by(table.c.id)
+                ).scalars()
+                connection.execute(table.update().where(table.c.id == first).values(name="renamed"))
+                connection.execute(table.delete().where(table.c.id == third))
+        else:
+            # Switched: new requests go to the target, the source copy is still there
+            assert router.shard_for_owner(owner_id) == target
+            assert not router.shard_map.is_frozen(owner_id)
+            assert names(router.engines[source], owner_id) == ["renamed", "asset 1"]
+
+    monkeypatch.setattr(sharding.time, "sleep", sleep)
+    move_owner(router, owner_id, target, settle=0.5)
+
+    assert waits == [router.shard_map.reload_interval + 0.5, settings.CACHE_LOCAL_TTL + 0.5]
+    assert names(router.engines[target], owner_id) == ["renamed", "asset 1"]
+    assert names(router.engines[source], owner_id) == []
+    with router.sessionmaker() as session:
+        assert session.get(User, owner_id).email == "owner@example.com"
+
+
+def test_processes_sharing_sqlite_shards_allocate_distinct_ids(router, owner, tmp_path):
+    owner_id, _ = owner
+    # A second process: its own router and connections over the same files
+    other = ShardRouter(
+        [f"sqlite:///{tmp_path}/shard0.db", f"sqlite:///{tmp_path}/shard1.db"], str(tmp_path / "shard_map.json")
+    )
+    ids = []
+    for sessionmaker in (router.sessionmaker, other.sessionmaker, router.sessionmaker):
+        with sessionmaker() as session:
+            asset = DigitalAsset(owner_id=owner_id, asset_type="documents", name="late")
+            session.add(asset)
+            session.commit()
+            ids.append(asset.id)
+    for engine in other.engines.values():
+        engine.dispose()
+    assert len(set(ids)) == 3
+    assert len({asset_id % 2 for asset_id in ids}) == 1
+
+
+def test_failed_move_lifts_the_freeze(router, owner, monkeypatch):
+    owner_id, source = owner
+    target = "1" if source == "0" else "0"
+
+    def interrupted(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(sharding.time, "sleep", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        move_owner(router, owner_id, target)
+    assert not router.shard_map.is_frozen(owner_id)
+    assert router.shard_for_owner(owner_id) == source
@@ -0,0 +1,41 @@
+import time
+
+from app.config import settings
+from app.throttle import MemoryThrottleStore
+
+
+def test_memory_store_evicts_least_recently_hit_keys_at_the_cap():
+    store = MemoryThrottleStore(max_keys=3)
+    now = 1000.0
+    for key in ("a", "b", "c"):
+        store.hit(key, 60, now)
+    store.hit("a", 60, now)
+    store.hit("d", 60, now)
+
+    assert len(store._windows) == 3
+    assert store.peek("b", 60, now) == 0.0
+    assert store.peek("a", 60, now) == 2.0
+    assert store.peek("d", 60, now) == 1.0
+
+
+def test_memory_store_hits_stay_cheap_when_full():
+    store = MemoryThrottleStore(max_keys=100000)
+    now = 1000.0
+    for index in range(100000):
+        store.hit(f"ip:{index}", 60, now)
+
+    started = time.perf_counter()
+    for index in range(100000, 101000):
+        store.hit(f"ip:{index}", 60, now)
+    # A full scan per hit took ~6ms each, i.e. seconds for this loop
+    assert time.perf_counter() - started < 0.5
+    assert len(store._windows) == 100000
+
+
+def test_metrics_are_for_operators_only(client, make_user, monkeypatch):
+    assert client.get("/auth/throttle/metrics").status_code == 403
+    headers, _ = make_user("operator@example.com")
+    assert client.get("/auth/throttle/metrics", headers=headers).status_code == 403
+    monkeypatch.setattr(settings, "OPERATOR_EMAILS", ["operator@example.com"])
+    response = client.get("/auth/throttle/metrics", headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud import event as event_crud
+from app.models.event import AssetTransfer, DeathVerificationEvent
+
+
+@pytest.fixture
+def missed_checkin(client, db, estate, make_user):
+    """An estate whose owner missed a check-in; returns the parties and the opened event."""
+
+    def build(heirs=1):
+        beneficiaries = [make_user() for _ in range(heirs)]
+        parties = estate(count=1, beneficiary=beneficiaries[0])
+        owner_headers, owner_id = parties["owner"]
+        for beneficiary in beneficiaries[1:]:
+            client.post(f"/assets/{parties['assets'][0]['id']}/beneficiaries", headers=owner_headers,
+                        json={"user_id": beneficiary[1], "share_percentage": 50})
+        client.put("/users/me/checkin-settings", headers=owner_headers, json={"checkin_interval": 60})
+        assert event_crud.open_missed_checkin_verifications(db, now=datetime.utcnow() + timedelta(minutes=5)) == 1
+        event = db.query(DeathVerificationEvent).filter(DeathVerificationEvent.user_id == owner_id).one()
+        return parties, beneficiaries, event
+
+    return build
+
+
+def test_check_in_after_a_missed_deadline_blocks_approvals(client, db, missed_checkin):
+    parties, (beneficiary,), event = missed_checkin()
+    assert event.required_approvals == 1
+    client.post("/users/me/checkin", headers=parties["owner"][0])
+    db.refresh(event)
+    assert event.status == "rejected"
+
+    response = client.post(f"/death-verifications/{event.id}/approvals", headers=beneficiary[0],
+                           json={"approval_status": "approved"})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Event is not pending"
+
+    results = client.post("/death-verifications/approvals/bulk", headers=beneficiary[0], json={
+        "approvals": [{"event_id": event.id, "approval_status": "approved"}]
+    }).json()
+    assert [(result["ok"], result["error"]) for result in results] == [(False, "Event is not pending")]
+
+    db.refresh(event)
+    assert event.status == "rejected"
+    assert db.query(AssetTransfer).filter(AssetTransfer.death_event_id == event.id).count() == 0
+
+
+def test_missed_checkin_needs_approvals_from_beneficiaries(client, db, missed_checkin, make_user):
+    parties, beneficiaries, event = missed_checkin(heirs=3)
+    assert event.required_approvals == 2
+
+    stranger_headers, _ = make_user()
+    response = client.post(f"/death-verifications/{event.id}/approvals", headers=stranger_headers,
+                           json={"approval_status": "approved"})
+    assert response.status_code == 403
+
+    for beneficiary in beneficiaries[:2]:
+        response = client.post(f"/death-verifications/{event.id}/approvals", headers=beneficiary[0],
+                               json={"approval_status": "approved"})
+        assert response.status_code == 200, response.text
+    db.refresh(event)
+    assert event.status == "verified"
+
+
+def test_bulk_approvals_only_move_pending_events(client, db, estate):
+    parties = estate(count=1)
+    owner_headers, owner_id = parties["owner"]
+    beneficiary_headers, _ = parties["beneficiary"]
+
+    def open_event(required):
+        return client.post("/death-verifications", headers=owner_headers, json={
+            "user_id": owner_id, "verification_type": "death_certificate", "evidence_data": {},
+            "required_approvals": required,
+        }).json()["id"]
+
+    rejected, pending, lowered = open_event(1), open_event(3), open_event(3)
+    db.get(DeathVerificationEvent, rejected).status = "rejected"
+    # Threshold lowered below the count already reached: verified on the next approval, as in add_approval
+    db.get(DeathVerificationEvent, lowered).current_approvals = 4
+    db.commit()
+
+    results = client.post("/death-verifications/approvals/bulk", headers=beneficiary_headers, json={"approvals": [
+        {"event_id": event_id, "approval_status": "approved"} for event_id in (rejected, pending, lowered, 999999)
+    ]}).json()
+
+    assert [(result["ok"], result.get("error"), result.get("status")) for result in results] == [
+        (False, "Event is not pending", None),
+        (True, None, "pending"),
+        (True, None, "verified"),
+        (False, "Event not found", None),
+    ]
+    db.expire_all()
+    assert db.get(DeathVerificationEvent, rejected).status == "rejected"
+    assert db.get(DeathVerificationEvent, rejected).current_approvals == 0
+    assert db.query(AssetTransfer).filter(AssetTransfer.death_event_id == lowered).count() == 1
+
+
+def test_check_in_after_re_arming_via_settings_rejects_the_event(client, db, missed_checkin):
+    parties, (beneficiary,), event = missed_checkin()
+    owner_headers = parties["owner"][0]
+    assert client.put("/users/me/checkin-settings", headers=owner_headers, json={"checkin_interval": 120}).status_code == 200
+    assert client.post("/users/me/checkin", headers=owner_headers).status_code == 200
+
+    db.refresh(event)
+    assert event.status == "rejected"
+    response = client.post(f"/death-verifications/{event.id}/approvals", headers=beneficiary[0],
+                           json={"approval_status": "approved"})
+    assert response.status_code == 409
+    assert db.query(AssetTransfer).filter(AssetTransfer.death_event_id == event.id).count() == 0
+
+
+def test_turning_the_switch_off_rejects_the_pending_event(client, db, missed_checkin):
+    parties, _, event = missed_checkin()
+    response = client.put("/users/me/checkin-settings", headers=parties["owner"][0], json={"checkin_interval": None})
+    assert response.status_code == 200
+
+    db.refresh(event)
+    assert event.status == "rejected"
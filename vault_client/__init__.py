@@ -0,0 +1,6 @@
+"""Python client for the Digital Legacy Vault API."""
+from vault_client._base import VaultAPIError
+from vault_client.client import VaultClient
+from vault_client.aio import AsyncVaultClient
+
+__all__ = ["VaultClient", "AsyncVaultClient", "VaultAPIError"]
@@ -0,0 +1,250 @@
+import base64
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from app.schemas.user import User, Token, CheckinStatus
+from app.schemas.asset import DigitalAsset, DigitalAssetWithBeneficiaries, Beneficiary, InheritancePage
+from app.schemas.event import DeathVerification, MultisigApproval, AssetTransfer, BulkApprovalResult
+from app.schemas.audit import InclusionProof, LogVerification
+
+RETRY_STATUSES = (429, 503)
+# Refresh the token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 60
+# Mirrors the server's default BATCH_MAX_REQUESTS
+BATCH_CHUNK_SIZE = 50
+
+
+class VaultAPIError(Exception):
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class Call:
+    """A single API call, shared by the sync and async clients."""
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    json: Optional[Any] = None
+    model: Any = None
+    many: bool = False
+    auth: bool = True
+
+    def query(self) -> Optional[Dict[str, Any]]:
+        if not self.params:
+            return None
+        return {key: value for key, value in self.params.items() if value is not None}
+
+    def parse(self, data):
+        # Sparse fieldsets come back as plain dicts
+        if self.model is None or (self.query() or {}).get("fields"):
+            return data
+        if self.many:
+            return [self.model.model_validate(item) for item in data]
+        return self.model.model_validate(data)
+
+    def batch_item(self, item_id: Optional[str] = None):
+        path = self.path
+        if self.query():
+            path = f"{path}?{urlencode(self.query())}"
+        return {"id": item_id, "method": self.method, "path": path, "body": self.json}
+
+
+def _dump(model) -> Dict[str, Any]:
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json", exclude_unset=True)
+    return model
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Read the exp claim without verifying the signature; the server does that."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, response=None, base: float = 0.25, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After (up to ``cap``) when the server sends it."""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(cap, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def can_retry(call: Call, error: httpx.TransportError) -> bool:
+    """GETs can be retried after any transport error. Other calls are retried only if the
+    request never reached the server, so a POST the server already handled isn't repeated."""
+    if call.method == "GET":
+        return True
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def raise_for_status(response):
+    if response.status_code >= 400:
+        try:
+            detail = response.json().get("detail")
+        except ValueError:
+            detail = response.text
+        raise VaultAPIError(response.status_code, detail)
+
+
+def parse_batch(calls: List[Call], results: List[Dict[str, Any]]) -> List[Any]:
+    """Parse /batch results; failed sub-requests come back as VaultAPIError instances."""
+    parsed = []
+    for call, result in zip(calls, results):
+        if result["status"] >= 400:
+            detail = result["body"].get("detail") if isinstance(result["body"], dict) else result["body"]
+            parsed.append(VaultAPIError(result["status"], detail))
+        else:
+            parsed.append(call.parse(result["body"]))
+    return parsed
+
+
+class BaseVaultClient:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        token: Optional[str] = None,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.email = email
+        self.password = password
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._token: Optional[str] = None
+        self._token_expires_at: Optional[float] = None
+        if token:
+            self._set_token(token)
+
+    def _set_token(self, token: str):
+        self._token = token
+        self._token_expires_at = token_expiry(token)
+
+    def _needs_login(self) -> bool:
+        if self.email is None or self.password is None:
+            return False
+        if self._token is None:
+            return True
+        return self._token_expires_at is not None and self._token_expires_at - time.time() < TOKEN_REFRESH_MARGIN
+
+    def _headers(self, call: Call) -> Dict[str, str]:
+        if call.auth and self._token:
+            return {"Authorization": f"Bearer {self._token}"}
+        return {}
+
+    def _login_call(self) -> Call:
+        return Call("POST", "/auth/login", json={"email": self.email, "password": self.password}, model=Token, auth=False)
+
+
+# Call builders
+def register(email: str, password: str, full_name: str, date_of_birth: Optional[str] = None) -> Call:
+    body = {"email": email, "password": password, "full_name": full_name, "date_of_birth": date_of_birth}
+    return Call("POST", "/auth/register", json=body, model=User, auth=False)
+
+
+def me() -> Call:
+    return Call("GET", "/users/me", model=User)
+
+
+def update_checkin_settings(checkin_interval: Optional[int]) -> Call:
+    return Call("PUT", "/users/me/checkin-settings", json={"checkin_interval": checkin_interval}, model=User)
+
+
+def check_in() -> Call:
+    return Call("POST", "/users/me/checkin", model=CheckinStatus)
+
+
+def list_inheritances(after: Optional[int] = None, limit: int = 50) -> Call:
+    return Call("GET", "/users/me/inheritances", params={"after": after, "limit": limit}, model=InheritancePage)
+
+
+def create_asset(asset) -> Call:
+    return Call("POST", "/assets", json=_dump(asset), model=DigitalAsset)
+
+
+def list_assets(skip: int = 0, limit: int = 100, fields: Optional[str] = None) -> Call:
+    return Call("GET", "/assets", params={"skip": skip, "limit": limit, "fields": fields}, model=DigitalAsset, many=True)
+
+
+def get_asset(asset_id: int, fields: Optional[str] = None) -> Call:
+    return Call("GET", f"/assets/{asset_id}", params={"fields": fields}, model=DigitalAssetWithBeneficiaries)
+
+
+def add_beneficiary(asset_id: int, beneficiary) -> Call:
+    return Call("POST", f"/assets/{asset_id}/beneficiaries", json=_dump(beneficiary), model=Beneficiary)
+
+
+def create_death_verification(event) -> Call:
+    return Call("POST", "/death-verifications", json=_dump(event), model=DeathVerification)
+
+
+def get_death_verification(event_id: int, fields: Optional[str] = None) -> Call:
+    return Call("GET", f"/death-verifications/{event_id}", params={"fields": fields}, model=DeathVerification, auth=False)
+
+
+def approve(event_id: int, approval) -> Call:
+    return Call("POST", f"/death-verifications/{event_id}/approvals", json=_dump(approval), model=MultisigApproval)
+
+
+def approve_many(approvals) -> Call:
+    return Call(
+        "POST", "/death-verifications/approvals/bulk",
+        json={"approvals": [_dump(approval) for approval in approvals]}, model=BulkApprovalResult, many=True
+    )
+
+
+def list_transfers(fields: Optional[str] = None) -> Call:
+    return Call("GET", "/transfers", params={"fields": fields}, model=AssetTransfer, many=True)
+
+
+def transfer_proof(transfer_id: int) -> Call:
+    return Call("GET", f"/transfers/{transfer_id}/proof", model=InclusionProof)
+
+
+def verify_audit_log(full: bool = False) -> Call:
+    return Call("GET", "/audit/verify", params={"full": full}, model=LogVerification)
+
+
+def batch(calls: List[Call]) -> Call:
+    return Call("POST", "/batch", json={"requests": [call.batch_item(str(i)) for i, call in enumerate(calls)]})
+
+
+class SSEParser:
+    """Incremental Server-Sent Events parser; feed it lines, get (event, data) pairs back."""
+
+    def __init__(self):
+        self.event = None
+        self.data: List[str] = []
+
+    def feed(self, line: str):
+        if not line:
+            message = (self.event, json.loads("\n".join(self.data))) if self.data else None
+            self.event, self.data = None, []
+            return message
+        if line.startswith("event:"):
+            self.event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            self.data.append(line[len("data:"):].strip())
+        # Comment lines (": keep-alive") are ignored
+        return None
@@ -0,0 +1,184 @@
+import asyncio
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+import httpx
+
+from vault_client import _base
+from vault_client._base import BaseVaultClient, Call, RETRY_STATUSES, BATCH_CHUNK_SIZE
+
+
+class AsyncVaultClient(BaseVaultClient):
+    """Asyncio client with the same API as ``VaultClient``; all calls share one connection pool.
+
+    Pass ``transport=httpx.ASGITransport(app=app)`` to run against the app in-process.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._login_lock = asyncio.Lock()
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=transport,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self._http.aclose()
+
+    async def login(self, email: Optional[str] = None, password: Optional[str] = None) -> str:
+        if email is not None:
+            self.email, self.password = email, password
+        token = await self._send(self._login_call())
+        self._set_token(token.access_token)
+        return self._token
+
+    async def _ensure_token(self):
+        if self._needs_login():
+            async with self._login_lock:
+                if self._needs_login():
+                    await self.login()
+
+    async def _request(self, call: Call) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._http.request(
+                    call.method, call.path, params=call.query(), json=call.json, headers=self._headers(call)
+                )
+            except httpx.TransportError as error:
+                if attempt == self.max_retries or not _base.can_retry(call, error):
+                    raise
+                await asyncio.sleep(_base.backoff_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            await asyncio.sleep(_base.backoff_delay(attempt, response))
+        return response
+
+    async def _send(self, call: Call) -> Any:
+        if call.auth:
+            await self._ensure_token()
+        response = await self._request(call)
+        if response.status_code == 401 and call.auth and self.email is not None:
+            # Token revoked or expired early: log in again and retry once
+            async with self._login_lock:
+                await self.login()
+            response = await self._request(call)
+        _base.raise_for_status(response)
+        return call.parse(response.json())
+
+    # Endpoints
+    async def register(self, email: str, password: str, full_name: str, date_of_birth: Optional[str] = None):
+        return await self._send(_base.register(email, password, full_name, date_of_birth))
+
+    async def me(self):
+        return await self._send(_base.me())
+
+    async def update_checkin_settings(self, checkin_interval: Optional[int]):
+        return await self._send(_base.update_checkin_settings(checkin_interval))
+
+    async def check_in(self):
+        return await self._send(_base.check_in())
+
+    async def list_inheritances(self, after: Optional[int] = None, limit: int = 50):
+        return await self._send(_base.list_inheritances(after, limit))
+
+    async def iter_inheritances(self, page_size: int = 100) -> AsyncIterator[Any]:
+        after = None
+        while True:
+            page = await self.list_inheritances(after=after, limit=page_size)
+            for item in page.items:
+                yield item
+            if page.next_after is None:
+                return
+            after = page.next_after
+
+    async def create_asset(self, asset):
+        return await self._send(_base.create_asset(asset))
+
+    async def list_assets(self, skip: int = 0, limit: int = 100, fields: Optional[str] = None):
+        return await self._send(_base.list_assets(skip, limit, fields))
+
+    async def iter_assets(self, page_size: int = 100, fields: Optional[str] = None) -> AsyncIterator[Any]:
+        """Lazily page through all of the user's assets."""
+        skip = 0
+        while True:
+            page = await self.list_assets(skip=skip, limit=page_size, fields=fields)
+            for item in page:
+                yield item
+            if len(page) < page_size:
+                return
+            skip += page_size
+
+    async def get_asset(self, asset_id: int, fields: Optional[str] = None):
+        return await self._send(_base.get_asset(asset_id, fields))
+
+    async def add_beneficiary(self, asset_id: int, beneficiary):
+        return await self._send(_base.add_beneficiary(asset_id, beneficiary))
+
+    async def create_death_verification(self, event):
+        return await self._send(_base.create_death_verification(event))
+
+    async def get_death_verification(self, event_id: int, fields: Optional[str] = None):
+        return await self._send(_base.get_death_verification(event_id, fields))
+
+    async def approve(self, event_id: int, approval):
+        return await self._send(_base.approve(event_id, approval))
+
+    async def approve_many(self, approvals):
+        return await self._send(_base.approve_many(approvals))
+
+    async def list_transfers(self, fields: Optional[str] = None):
+        return await self._send(_base.list_transfers(fields))
+
+    async def transfer_proof(self, transfer_id: int):
+        return await self._send(_base.transfer_proof(transfer_id))
+
+    async def verify_audit_log(self, full: bool = False):
+        return await self._send(_base.verify_audit_log(full))
+
+    async def watch_verification(self, event_id: int) -> AsyncIterator[Tuple[str, Any]]:
+        """Follow a verification's Server-Sent Events stream until it is verified or rejected."""
+        async for message in self._stream(f"/death-verifications/{event_id}/events", auth=False):
+            yield message
+
+    async def watch_transfers(self) -> AsyncIterator[Tuple[str, Any]]:
+        async for message in self._stream("/transfers/stream", auth=True):
+            yield message
+
+    async def _stream(self, path: str, auth: bool):
+        call = Call("GET", path, auth=auth)
+        if auth:
+            await self._ensure_token()
+        parser = _base.SSEParser()
+        async with self._http.stream("GET", path, headers=self._headers(call), timeout=None) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                _base.raise_for_status(response)
+            async for line in response.aiter_lines():
+                message = parser.feed(line)
+                if message is not None:
+                    yield message
+
+    # Bulk helpers, sent through POST /batch
+    async def batch(self, calls: List[Call]) -> List[Any]:
+        results = []
+        for start in range(0, len(calls), BATCH_CHUNK_SIZE):
+            chunk = calls[start:start + BATCH_CHUNK_SIZE]
+            results.extend(_base.parse_batch(chunk, await self._send(_base.batch(chunk))))
+        return results
+
+    async def create_assets(self, assets) -> List[Any]:
+        return await self.batch([_base.create_asset(asset) for asset in assets])
+
+    async def add_beneficiaries(self, asset_id: int, beneficiaries) -> List[Any]:
+        return await self.batch([_base.add_beneficiary(asset_id, beneficiary) for beneficiary in beneficiaries])
+
+    async def get_assets(self, asset_ids, fields: Optional[str] = None) -> List[Any]:
+        return await self.batch([_base.get_asset(asset_id, fields) for asset_id in asset_ids])
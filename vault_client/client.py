@@ -0,0 +1,182 @@
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+import httpx
+
+from vault_client import _base
+from vault_client._base import BaseVaultClient, Call, RETRY_STATUSES, BATCH_CHUNK_SIZE
+
+
+class VaultClient(BaseVaultClient):
+    """Synchronous client. All calls share one keep-alive connection pool.
+
+    Pass ``email`` and ``password`` to have the client log in, and log in again when the
+    token is about to expire or is rejected. Use as a context manager or call ``close()``.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", transport: Optional[httpx.BaseTransport] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._login_lock = threading.Lock()
+        self._http = httpx.Client(
+            base_url=self.base_url,
+            transport=transport,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._http.close()
+
+    def login(self, email: Optional[str] = None, password: Optional[str] = None) -> str:
+        if email is not None:
+            self.email, self.password = email, password
+        token = self._send(self._login_call())
+        self._set_token(token.access_token)
+        return self._token
+
+    def _ensure_token(self):
+        if self._needs_login():
+            with self._login_lock:
+                if self._needs_login():
+                    self.login()
+
+    def _request(self, call: Call) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._http.request(
+                    call.method, call.path, params=call.query(), json=call.json, headers=self._headers(call)
+                )
+            except httpx.TransportError as error:
+                if attempt == self.max_retries or not _base.can_retry(call, error):
+                    raise
+                time.sleep(_base.backoff_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            time.sleep(_base.backoff_delay(attempt, response))
+        return response
+
+    def _send(self, call: Call) -> Any:
+        if call.auth:
+            self._ensure_token()
+        response = self._request(call)
+        if response.status_code == 401 and call.auth and self.email is not None:
+            # Token revoked or expired early: log in again and retry once
+            with self._login_lock:
+                self.login()
+            response = self._request(call)
+        _base.raise_for_status(response)
+        return call.parse(response.json())
+
+    # Endpoints
+    def register(self, email: str, password: str, full_name: str, date_of_birth: Optional[str] = None):
+        return self._send(_base.register(email, password, full_name, date_of_birth))
+
+    def me(self):
+        return self._send(_base.me())
+
+    def update_checkin_settings(self, checkin_interval: Optional[int]):
+        return self._send(_base.update_checkin_settings(checkin_interval))
+
+    def check_in(self):
+        return self._send(_base.check_in())
+
+    def list_inheritances(self, after: Optional[int] = None, limit: int = 50):
+        return self._send(_base.list_inheritances(after, limit))
+
+    def iter_inheritances(self, page_size: int = 100) -> Iterator[Any]:
+        after = None
+        while True:
+            page = self.list_inheritances(after=after, limit=page_size)
+            yield from page.items
+            if page.next_after is None:
+                return
+            after = page.next_after
+
+    def create_asset(self, asset):
+        return self._send(_base.create_asset(asset))
+
+    def list_assets(self, skip: int = 0, limit: int = 100, fields: Optional[str] = None):
+        return self._send(_base.list_assets(skip, limit, fields))
+
+    def iter_assets(self, page_size: int = 100, fields: Optional[str] = None) -> Iterator[Any]:
+        """Lazily page through all of the user's assets."""
+        skip = 0
+        while True:
+            page = self.list_assets(skip=skip, limit=page_size, fields=fields)
+            yield from page
+            if len(page) < page_size:
+                return
+            skip += page_size
+
+    def get_asset(self, asset_id: int, fields: Optional[str] = None):
+        return self._send(_base.get_asset(asset_id, fields))
+
+    def add_beneficiary(self, asset_id: int, beneficiary):
+        return self._send(_base.add_beneficiary(asset_id, beneficiary))
+
+    def create_death_verification(self, event):
+        return self._send(_base.create_death_verification(event))
+
+    def get_death_verification(self, event_id: int, fields: Optional[str] = None):
+        return self._send(_base.get_death_verification(event_id, fields))
+
+    def approve(self, event_id: int, approval):
+        return self._send(_base.approve(event_id, approval))
+
+    def approve_many(self, approvals):
+        return self._send(_base.approve_many(approvals))
+
+    def list_transfers(self, fields: Optional[str] = None):
+        return self._send(_base.list_transfers(fields))
+
+    def transfer_proof(self, transfer_id: int):
+        return self._send(_base.transfer_proof(transfer_id))
+
+    def verify_audit_log(self, full: bool = False):
+        return self._send(_base.verify_audit_log(full))
+
+    def watch_verification(self, event_id: int) -> Iterator[Tuple[str, Any]]:
+        """Follow a verification's Server-Sent Events stream until it is verified or rejected."""
+        yield from self._stream(f"/death-verifications/{event_id}/events", auth=False)
+
+    def watch_transfers(self) -> Iterator[Tuple[str, Any]]:
+        yield from self._stream("/transfers/stream", auth=True)
+
+    def _stream(self, path: str, auth: bool):
+        call = Call("GET", path, auth=auth)
+        if auth:
+            self._ensure_token()
+        parser = _base.SSEParser()
+        with self._http.stream("GET", path, headers=self._headers(call), timeout=None) as response:
+            if response.status_code >= 400:
+                response.read()
+                _base.raise_for_status(response)
+            for line in response.iter_lines():
+                message = parser.feed(line)
+                if message is not None:
+                    yield message
+
+    # Bulk helpers, sent through POST /batch
+    def batch(self, calls: List[Call]) -> List[Any]:
+        results = []
+        for start in range(0, len(calls), BATCH_CHUNK_SIZE):
+            chunk = calls[start:start + BATCH_CHUNK_SIZE]
+            results.extend(_base.parse_batch(chunk, self._send(_base.batch(chunk))))
+        return results
+
+    def create_assets(self, assets) -> List[Any]:
+        return self.batch([_base.create_asset(asset) for asset in assets])
+
+    def add_beneficiaries(self, asset_id: int, beneficiaries) -> List[Any]:
+        return self.batch([_base.add_beneficiary(asset_id, beneficiary) for beneficiary in beneficiaries])
+
+    def get_assets(self, asset_ids, fields: Optional[str] = None) -> List[Any]:
+        return self.batch([_base.get_asset(asset_id, fields) for asset_id in asset_ids])